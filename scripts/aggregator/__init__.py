@@ -1,3 +1,8 @@
 from .aggregator import Aggregator
+from .partitioned import PartitionedMaster
+from .batch import aggregate_players
+from .keys import pack_inns_id, unpack_inns_id, inns_label
+from .store import MasterStore
+from .master_data import MasterData
 
-__all__ = ["Aggregator"]
+__all__ = ["Aggregator", "PartitionedMaster", "aggregate_players", "pack_inns_id", "unpack_inns_id", "inns_label", "MasterStore", "MasterData"]
@@ -1,5 +1,21 @@
 
 import pandas as pd
+from transformer.categories import align_categories
+from .partitioned import PartitionedMaster, staged, commit
+from .keys import match_id_number, pack_inns_id, migrate_keys, check_keys
+from .merge import merge_sorted
+from .summary import update_summary, build_summary
+from .form import update_form
+from .changes import touched_rows, change_rows
+
+# Keys of each master table: (dedup keys, sort keys) passed to merge_df()
+MASTER_KEYS = {
+    'batting': (['Inns ID'], ['Player ID', 'Start Date']),
+    'bowling': (['Inns ID'], ['Player ID', 'Start Date']),
+    'fielding': (['Inns ID'], ['Player ID', 'Start Date']),
+    'allround': (['Inns ID'], ['Player ID', 'Start Date']),
+    'personal_info': (['Player ID'], ['Player ID'])
+}
 
 class Aggregator:
 
@@ -26,6 +42,15 @@ class Aggregator:
         self.allround_master = None
         self.info_master = None
 
+        # additive career sums per Player ID and Format, updated from the new rows of each run
+        self.summary_master = None
+
+        # last 10 / last 20 innings form of every batting and bowling innings
+        self.form_master = None
+
+        # rows inserted, updated and deleted by run_agg() per stat type, written under master/_changes/ by MasterData
+        self.changes = {}
+
         # dataframes to be concatenated
         self.batting_concat = None
         self.bowling_concat = None
@@ -43,17 +68,37 @@ class Aggregator:
         Parameters:
             tf_df (pd.DataFrame): The transformed dataframe (downloaded from S3) to be concatenated.
             stat_type (str): The type of statistics ('batting', 'bowling', 'fielding', 'allround', 'personal_info').
+
+        Raises:
+            ValueError: If a format or Match ID of the tf rows doesn't fit into the packed Inns ID (see keys.py),
+                        before anything is merged.
         """
 
+        # The tf rows are checked as they come in, so a player with keys that can't be packed fails here
+        if tf_df is not None and stat_type != 'personal_info':
+            try:
+                check_keys(tf_df)
+            except ValueError as e:
+                raise ValueError(f"{stat_type} stats of {self.player_name}: {e}") from e
+
         concat_df = tf_df.copy() if tf_df is not None else pd.DataFrame()
         
         if stat_type != 'personal_info':
             concat_df['Player ID'] = self.player_id
-            concat_df['Inns ID'] = (concat_df['Player ID'].astype(str)+"_"+
-                        concat_df['Format'].astype(str)+
-                        concat_df['Match ID'].astype(str)+"_"+
-                        concat_df['Inns'].astype(str)
-                       ) if tf_df is not None else None
+
+            # Integer Match ID ('#2742' -> 2742) and Inns ID packed into one int64 (see keys.py)
+            if tf_df is not None:
+                concat_df['Match ID'] = match_id_number(concat_df['Match ID'])
+                concat_df['Inns ID'] = pack_inns_id(concat_df)
+                # Int64 keys, like the master schemas read them (see master_data.py)
+                concat_df[['Player ID', 'Inns ID']] = concat_df[['Player ID', 'Inns ID']].astype('Int64')
+            else:
+                concat_df['Inns ID'] = None
+
+            # Arrow-backed tf frames (dtype_backend='pyarrow') get Arrow-backed key columns as well
+            if tf_df is not None and any(isinstance(dtype, pd.ArrowDtype) for dtype in tf_df.dtypes):
+                key_cols = ['Player ID', 'Match ID', 'Inns ID']
+                concat_df[key_cols] = concat_df[key_cols].convert_dtypes(dtype_backend='pyarrow')
 
         return concat_df
     
@@ -64,26 +109,105 @@ class Aggregator:
         This function handles the merging of dataframes, dropping duplicates,
         and sorting the resulting dataframe based on specified keys.
 
+        With a PartitionedMaster only the partition of this player is merged and replaced,
+        the partitions of the other players are left as they are.
+
         Parameters:
-            master_df (pd.DataFrame): The master dataframe to merge with.
+            master_df (pd.DataFrame or PartitionedMaster): The master dataframe to merge with.
             concat_df (pd.DataFrame): The concatenated dataframe to merge.
             dedup_keys (list): The keys to use for dropping duplicates.
             sort_keys (list): The keys to use for sorting the resulting dataframe.
         """
 
-        if concat_df.empty:
+        if isinstance(master_df, PartitionedMaster):
+            # Every key of a player's rows (Inns ID, Player ID) is unique to that player,
+            # so deduplicating and sorting within the partition gives the same rows as the full master
+            if not concat_df.empty:
+                # A new partition is deduplicated and sorted the same way as an existing one
+                partition = master_df.get(self.player_id)
+                if partition is None:
+                    partition = concat_df.iloc[0:0]
+                master_df.replace(self.player_id, self.merge_df(partition, concat_df, dedup_keys, sort_keys))
+
+        elif concat_df.empty:
             pass
         elif master_df is None:
             master_df = concat_df
         else:
-            master_df = pd.concat([master_df, concat_df])\
-                            .drop_duplicates(subset=dedup_keys, keep='last')\
-                            .sort_values(by=sort_keys)\
-                            .reset_index(drop=True)
+            # Masters stored with the old string keys get integer Match IDs and packed Inns IDs
+            master_df = migrate_keys(master_df)
+
+            # Same categories on both sides, so the categorical columns survive the concat
+            master_df, concat_df = align_categories(master_df, concat_df)
+
+            # Arrow-backed columns of the new rows (dtype_backend='pyarrow') are kept on the master side too,
+            # otherwise the concat would fall back to object columns
+            arrow_cols = {col: concat_df[col].dtype for col in master_df.columns.intersection(concat_df.columns)
+                          if isinstance(concat_df[col].dtype, pd.ArrowDtype) and master_df[col].dtype != concat_df[col].dtype}
+            if arrow_cols:
+                master_df = master_df.astype(arrow_cols)
+
+            # The master is kept sorted, so the new rows are merged into it instead of re-sorting everything
+            master_df = merge_sorted(master_df, concat_df, dedup_keys, sort_keys)
 
         return master_df
     
 
+    def merge_stat(self, stat_type, master_df, concat_df, summary_df=None, form_df=None):
+
+        """
+        Merges the new rows of one stat type into a master table and takes the career summary, the form
+        table and the change rows along. The tables passed in are not changed (a PartitionedMaster is merged
+        into a staged copy), so a step that fails leaves them as they were: callers keep the returned state
+        only once every step succeeded, with commit() for partitioned tables.
+
+        Parameters:
+            stat_type (str): The type of statistics ('batting', 'bowling', 'fielding', 'allround', 'personal_info').
+            master_df (pd.DataFrame or PartitionedMaster): The master table before the merge, or None.
+            concat_df (pd.DataFrame): The new rows (prepare_concat_df() output).
+            summary_df (pd.DataFrame): The career summary, or None.
+            form_df (pd.DataFrame or PartitionedMaster): The form table, or None.
+
+        Returns:
+            tuple: (master table, career summary, form table, change rows or None) after the merge.
+        """
+
+        # Step 1: The summary delta and the old images of the touched rows are taken before the merge
+        summary_df = update_summary(summary_df, master_df, concat_df, stat_type)
+        before_df = touched_rows(master_df, concat_df)
+
+        # Step 2: Merge, then compare the touched rows and recompute the form of the new innings
+        master_df = self.merge_df(staged(master_df), concat_df, *MASTER_KEYS[stat_type])
+        changes = change_rows(before_df, touched_rows(master_df, concat_df), MASTER_KEYS[stat_type][0])
+        form_df = update_form(staged(form_df), master_df, concat_df, stat_type)
+
+        return master_df, summary_df, form_df, changes
+
+    def add_changes(self, stat_type, changes):
+
+        """
+        Adds the change rows of a merge (see changes.py) to self.changes[stat_type], after the changes of
+        earlier runs.
+        """
+
+        if changes is None:
+            return
+
+        if self.changes.get(stat_type) is not None:
+            changes = pd.concat(align_categories(self.changes[stat_type], changes), ignore_index=True)
+        self.changes[stat_type] = changes
+        print(f"{stat_type} changes: " + ", ".join(f"{count} {change}" for change, count in changes['Change'].value_counts(sort=False).items()))
+
+    def aggregate_stat(self, stat_type, attr, concat_df):
+
+        """Merges the new rows of one stat type into the master table in `attr` and keeps the new state."""
+
+        master_df, summary_df, form_df, changes = self.merge_stat(stat_type, getattr(self, attr), concat_df,
+                                                                  self.summary_master, self.form_master)
+        setattr(self, attr, commit(getattr(self, attr), master_df))
+        self.summary_master, self.form_master = summary_df, commit(self.form_master, form_df)
+        self.add_changes(stat_type, changes)
+
     def run_agg(self, stat_type):
         
         """
@@ -95,48 +219,42 @@ class Aggregator:
             stat_type (str): The type of statistics ('all','batting', 'bowling', 'fielding', 'allround', 'personal_info').
         """
 
+        # Without a summary the updates below would only hold the delta of this run, so it is built from the masters
+        if self.summary_master is None and stat_type in ['all','batting','bowling','fielding']:
+            self.summary_master = build_summary({'batting': self.batting_master, 'bowling': self.bowling_master, 'fielding': self.fielding_master})
+
         if stat_type in ['all','batting']:
 
             print("Aggregating batting stats...")
             concat_df = self.prepare_concat_df(self.batting_concat,"batting")
-            self.batting_master = self.merge_df(self.batting_master, concat_df,
-                                                dedup_keys=['Inns ID'],
-                                                sort_keys=['Player ID', 'Start Date'])
+            self.aggregate_stat("batting", "batting_master", concat_df)
             print("Batting stats aggregated.")
             
         if stat_type in ['all','bowling']:
 
             print("Aggregating bowling stats...")
             concat_df = self.prepare_concat_df(self.bowling_concat,"bowling")
-            self.bowling_master = self.merge_df(self.bowling_master, concat_df,
-                                                dedup_keys=['Inns ID'],
-                                                sort_keys=['Player ID', 'Start Date'])
+            self.aggregate_stat("bowling", "bowling_master", concat_df)
             print("Bowling stats aggregated.")
 
         if stat_type in ['all','fielding']:
             
             print("Aggregating fielding stats...")
             concat_df = self.prepare_concat_df(self.fielding_concat,"fielding")
-            self.fielding_master = self.merge_df(self.fielding_master, concat_df,
-                                                 dedup_keys=['Inns ID'],
-                                                 sort_keys=['Player ID', 'Start Date'])
+            self.aggregate_stat("fielding", "fielding_master", concat_df)
             print("Fielding stats aggregated.")     
         
         if stat_type in ['all','allround']:
             
             print("Aggregating allround stats...")
             concat_df = self.prepare_concat_df(self.allround_concat ,"allround")
-            self.allround_master = self.merge_df(self.allround_master, concat_df,
-                                                 dedup_keys=['Inns ID'],
-                                                 sort_keys=['Player ID', 'Start Date'])
+            self.aggregate_stat("allround", "allround_master", concat_df)
             print("Allround stats aggregated.")
         
         if stat_type in ['all','personal_info']:
 
             print("Aggregating personal info...")
             concat_df = self.prepare_concat_df(self.info_concat, "personal_info")
-            self.info_master = self.merge_df(self.info_master, concat_df,
-                                             dedup_keys=['Player ID'],
-                                             sort_keys=['Player ID']) 
+            self.aggregate_stat("personal_info", "info_master", concat_df)
             print("Personal info aggregated.")
 
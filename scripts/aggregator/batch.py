@@ -0,0 +1,181 @@
+import time
+import pandas as pd
+from transformer.batch import raw_frames
+from transformer.categories import align_categories
+from .aggregator import Aggregator, MASTER_KEYS
+from .partitioned import PartitionedMaster, staged, commit
+from .summary import SUMMARY_COLS, update_summary, build_summary
+from .form import update_form
+from .changes import touched_rows
+
+# Master table of each stat type on a MasterData
+MASTER_ATTRS = {
+    'batting': 'battingstats',
+    'bowling': 'bowlingstats',
+    'fielding': 'fieldingstats',
+    'allround': 'allroundstats',
+    'personal_info': 'player_info'
+}
+
+
+def player_id_of(frames):
+
+    """Reads the Player ID of a player from the personal info of its tf frames."""
+
+    info = frames.get('personal_info')
+    if info is None or info.empty or 'Player ID' not in info.columns:
+        raise ValueError("personal info with a 'Player ID' is missing")
+    return info['Player ID'].iloc[0]
+
+
+def merge_batch(bucket_name, master, prepared, stat_types):
+
+    """
+    Merges the prepared rows of a batch into staged copies of the master tables, the career summary and
+    the form table. The master itself is not changed.
+
+    Parameters:
+        bucket_name (str): The name of the bucket where data is stored.
+        master: Object holding the master tables (see aggregate_players()).
+        prepared (dict): player name -> (Aggregator, {stat type: prepare_concat_df() output}).
+        stat_types (list): The stat types to merge.
+
+    Returns:
+        tuple: ({attribute: staged table}, {player name: error message} of the players that failed).
+    """
+
+    tables = {MASTER_ATTRS[table]: staged(getattr(master, MASTER_ATTRS[table])) for table in stat_types}
+    summary_df = getattr(master, 'career_summary', None)
+    if summary_df is None:
+        # The batch would only add its delta to a missing summary, so it is built from the masters first
+        summary_df = build_summary({stat: getattr(master, MASTER_ATTRS[stat], None) for stat in SUMMARY_COLS})
+    form_df = staged(getattr(master, 'form', None))
+    batch = Aggregator(bucket_name, "batch", None)
+    failed = {}
+
+    for table in stat_types:
+        master_df = tables[MASTER_ATTRS[table]]
+        concat_dfs = {name: dfs[table] for name, (agg, dfs) in prepared.items()
+                      if name not in failed and not dfs[table].empty}
+
+        print(f"Aggregating {table} stats of {len(concat_dfs)} players...")
+
+        if isinstance(master_df, PartitionedMaster):
+            # Each player only replaces its own partition (of the staged copy)
+            for name, concat_df in concat_dfs.items():
+                try:
+                    merged = prepared[name][0].merge_stat(table, master_df, concat_df, summary_df, form_df)
+                except Exception as e:
+                    print(f"Error in aggregating {table} stats of {name}: ", e)
+                    failed[name] = str(e)
+                    continue
+                master_df, summary_df, form_df = commit(master_df, merged[0]), merged[1], commit(form_df, merged[2])
+                batch.add_changes(table, merged[3])
+
+        elif concat_dfs:
+            try:
+                concat_df = pd.concat(align_categories(*concat_dfs.values()), ignore_index=True)
+
+                # Rows of many players are deduplicated and sorted even when there is no master yet
+                base_df = master_df if master_df is not None else concat_df.iloc[0:0]
+                merged = batch.merge_stat(table, base_df, concat_df, summary_df, form_df)
+            except Exception as e:
+                # Fall back to one player at a time, from the tables as they were before the stacked merge,
+                # so one bad frame doesn't fail the whole batch
+                print(f"Error in aggregating the stacked {table} stats, falling back to one player at a time: ", e)
+                for name, concat_df in concat_dfs.items():
+                    try:
+                        base_df = master_df if master_df is not None else concat_df.iloc[0:0]
+                        player_merged = batch.merge_stat(table, base_df, concat_df, summary_df, form_df)
+                    except Exception as e:
+                        print(f"Error in aggregating {table} stats of {name}: ", e)
+                        failed[name] = str(e)
+                        continue
+                    master_df, summary_df, form_df = player_merged[0], player_merged[1], commit(form_df, player_merged[2])
+                    batch.add_changes(table, player_merged[3])
+            else:
+                master_df, summary_df, form_df = merged[0], merged[1], commit(form_df, merged[2])
+                batch.add_changes(table, merged[3])
+
+        tables[MASTER_ATTRS[table]] = master_df
+
+    tables.update(career_summary=summary_df, form=form_df, changes=batch.changes)
+    return tables, failed
+
+
+def aggregate_players(bucket_name, players, master, stat_type="all"):
+
+    """
+    Aggregates the tf stats of many players into the master tables in one pass, so that each master
+    table is downloaded and uploaded once per batch instead of once per player.
+
+    A flat master table is merged once with the rows of all players. A PartitionedMaster gets one
+    partition replaced per player. Players that fail are left out and reported, the others are still merged.
+    The tables are merged into staged copies first and the master is only updated once every table
+    merged: if a player fails on any table, the batch is merged again without it, so no table keeps
+    rows of a failed player.
+
+    Parameters:
+        bucket_name (str): The name of the bucket where data is stored.
+        players (dict): player name -> tf frames, either a dict with 'batting', 'bowling', 'fielding',
+                        'allround' and 'personal_info' DataFrames or an object with the matching
+                        attributes (e.g. a tf LoadData or a TransformData).
+        master: Object holding the master tables in battingstats, bowlingstats, fieldingstats, allroundstats
+                and player_info (e.g. a MasterData), as DataFrames or PartitionedMaster, the
+                career_summary table in career_summary and the form table in form. Updated in place,
+                the delta of the batch is left in master.changes. If the download of one of its
+                tables failed (master.failed), nothing is merged.
+        stat_type (str): The type of statistics ('all', 'batting', 'bowling', 'fielding', 'allround', 'personal_info').
+
+    Returns:
+        dict: player name -> error message, or None if the player was aggregated.
+    """
+
+    start_time = time.time()
+    stat_types = [name for name in MASTER_ATTRS if stat_type in ['all', name]]
+    report = {}
+
+    # Step 1: A table whose download failed would be merged as if it were empty and its stored rows lost,
+    # so the batch stops before touching any table
+    failed_downloads = [name for name in stat_types + ['career_summary', 'form'] if name in getattr(master, 'failed', set())]
+    if failed_downloads:
+        print(f"Error: the master {', '.join(failed_downloads)} download failed, not aggregating the batch.")
+        return {name: f"master {', '.join(failed_downloads)} download failed" for name in players}
+
+    # Step 2: Prepare the rows of every player
+    prepared = {}
+    for name, tf in players.items():
+        frames = raw_frames(tf)
+        try:
+            agg = Aggregator(bucket_name, name, player_id_of(frames))
+            prepared[name] = (agg, {table: agg.prepare_concat_df(frames[table], table) for table in stat_types})
+            report[name] = None
+        except Exception as e:
+            print(f"Error in preparing the stats of {name}: ", e)
+            report[name] = str(e)
+
+    # Step 3: Merge every table into staged copies, again without the players that failed until none fails
+    while True:
+        tables, failed = merge_batch(bucket_name, master, prepared, stat_types)
+        if not failed:
+            break
+
+        report.update(failed)
+        prepared = {name: value for name, value in prepared.items() if name not in failed}
+        print(f"Merging the batch again without {len(failed)} failed players...")
+
+    # Step 4: Every table merged, update the master. Partitioned tables take over the replaced partitions
+    for attr, df in tables.items():
+        current = getattr(master, attr, None)
+        if isinstance(current, PartitionedMaster) and isinstance(df, PartitionedMaster):
+            current.update(df)
+        else:
+            setattr(master, attr, df)
+
+    failed = [name for name, error in report.items() if error is not None]
+    end_time = time.time()
+    print(f"Aggregated {len(report) - len(failed)} players ({len(failed)} failed) in {end_time - start_time:.2f} seconds")
+    for name in failed:
+        print(f"  {name}: {report[name]}")
+
+    return report
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from transformer.categories import align_categories
+from .merge import merge_sorted
+from .form import player_rows
+from .keys import migrate_keys
+
+# Kinds of change in a delta, in the order they are written
+CHANGE_TYPES = ['insert', 'update', 'delete']
+
+
+def touched_rows(master_df, concat_df):
+
+    """
+    The master rows of the players in `concat_df`, the only rows a merge can change. Taken before and
+    after the merge, they give the delta of the run. Returns None if there is no master or no new rows.
+    The rows of a master still stored with the old string keys are migrated, like merge_df() migrates
+    the master, so both images compare on the same keys.
+    """
+
+    if master_df is None or concat_df is None or concat_df.empty or 'Player ID' not in concat_df.columns:
+        return None
+
+    return migrate_keys(player_rows(master_df, concat_df['Player ID'].unique()))
+
+
+def key_index(df, keys):
+    return pd.MultiIndex.from_frame(df[keys]) if len(keys) > 1 else pd.Index(df[keys[0]])
+
+
+def row_images(df, columns):
+
+    """The rows as text, so images read with different dtypes (numpy or Arrow-backed, categories) compare equal."""
+
+    return df.reindex(columns=columns).astype('string').fillna('<NA>').to_numpy()
+
+
+def change_rows(before_df, after_df, dedup_keys):
+
+    """
+    Compares the rows of the touched players before and after a merge.
+
+    Parameters:
+        before_df (pd.DataFrame): touched_rows() of the master before the merge, or None.
+        after_df (pd.DataFrame): touched_rows() of the master after the merge, or None.
+        dedup_keys (list): The keys that identify a row, e.g. ['Inns ID'].
+
+    Returns:
+        pd.DataFrame: A 'Change' column ('insert', 'update' or 'delete') followed by the row image: the new row
+                      for inserts and updates, the old row for deletes. None if nothing changed.
+    """
+
+    if after_df is None and before_df is None:
+        return None
+    before_df = before_df if before_df is not None else after_df.iloc[0:0]
+    after_df = after_df if after_df is not None else before_df.iloc[0:0]
+
+    # Step 1: Inserted and deleted keys
+    old_keys, new_keys = key_index(before_df, dedup_keys), key_index(after_df, dedup_keys)
+    in_old = np.asarray(new_keys.isin(old_keys))
+    in_new = np.asarray(old_keys.isin(new_keys))
+
+    # Step 2: Rows kept under the same key are updates if their image changed. Keys are unique in the
+    # master, so both sides line up once sorted on them
+    kept_old = before_df[in_new].sort_values(dedup_keys, kind='stable')
+    kept_new = after_df[in_old].sort_values(dedup_keys, kind='stable')
+    changed = (row_images(kept_old, after_df.columns) != row_images(kept_new, after_df.columns)).any(axis=1)
+
+    frames = {
+        'insert': after_df[~in_old],
+        'update': kept_new[changed].sort_index(),
+        'delete': before_df[~in_new]
+    }
+    frames = [df.assign(Change=change) for change, df in frames.items() if not df.empty]
+    if not frames:
+        return None
+
+    changes = pd.concat(align_categories(*frames), ignore_index=True)
+    return changes[['Change'] + [col for col in changes.columns if col != 'Change']]
+
+
+def apply_changes(master_df, changes_df, dedup_keys, sort_keys):
+
+    """
+    Applies a delta to a copy of a master table, e.g. a consumer's copy of master/batting_stats.csv:
+    deleted keys are dropped, inserted and updated rows replace the rows with their keys.
+
+    Parameters:
+        master_df (pd.DataFrame): The master table the delta was taken against.
+        changes_df (pd.DataFrame): Change rows (change_rows() output, or several of them in run order).
+        dedup_keys (list): The keys that identify a row.
+        sort_keys (list): The keys the master is sorted on.
+
+    Returns:
+        pd.DataFrame: The master table with the changes applied.
+    """
+
+    if changes_df is None or changes_df.empty:
+        return master_df
+
+    # Step 1: Of several changes to a key only the last one counts
+    changes_df = changes_df.drop_duplicates(subset=dedup_keys, keep='last')
+    deleted = (changes_df['Change'] == 'delete').to_numpy()
+    rows = changes_df[~deleted].drop(columns=[col for col in ['Change', 'Run ID'] if col in changes_df.columns])
+
+    # Step 2: Drop the deleted keys, then merge the new images in
+    if master_df is None:
+        master_df = rows.iloc[0:0]
+    master_df = master_df[~np.asarray(key_index(master_df, dedup_keys).isin(key_index(changes_df[deleted], dedup_keys)))]
+
+    return merge_sorted(*align_categories(master_df, rows), dedup_keys, sort_keys)
@@ -0,0 +1,176 @@
+import pandas as pd
+from transformer.categories import align_categories
+from transformer.schema import Schema, Column
+from .partitioned import PartitionedMaster
+from .merge import merge_sorted
+from .summary import NOT_OUT, overs_to_balls
+
+# Innings windows of the form metrics ("last 10 / last 20 innings")
+FORM_WINDOWS = [10, 20]
+FORM_GROUP = ['Player ID', 'Format']
+FORM_KEYS = ['Player ID', 'Format', 'Start Date', 'Inns ID', 'Stat']
+
+FORM_COLS = {
+    'batting': [f'{metric} {window}' for window in FORM_WINDOWS for metric in ['Bat Avg', 'Bat SR']],
+    'bowling': [f'Econ {window}' for window in FORM_WINDOWS]
+}
+
+# One row per batting or bowling innings of the masters, with the metrics over the innings up to and including it
+FORM_SCHEMA = Schema('form', [
+    Column('Player ID', 'Int64', nullable=False),
+    Column('Format', 'category', nullable=False),
+    Column('Start Date', 'datetime64[ns]', nullable=False),
+    Column('Inns ID', 'Int64', nullable=False),
+    Column('Stat', 'string', nullable=False)
+] + [Column(col, 'float64') for cols in FORM_COLS.values() for col in cols])
+
+
+def innings_values(df, stat_type):
+
+    """Keeps the rows that are innings of the stat type (batted / bowled) and adds the values the windows sum."""
+
+    if stat_type == 'batting':
+        runs = df['Runs'].astype('Float64')
+        df = df[runs.notna().to_numpy()]
+        not_out = df['Dismissal'].astype(object).isin(NOT_OUT)
+        values = {
+            'runs': df['Runs'],
+            'bf': df['BF'],
+            'outs': ~not_out & df['Dismissal'].notna()
+        }
+    else:
+        overs = df['Overs'].astype('Float64')
+        df = df[overs.notna().to_numpy()]
+        values = {
+            'conceded': df['Runs'],
+            'balls': overs_to_balls(df['Overs'].astype('Float64'))
+        }
+
+    values = pd.DataFrame({name: pd.Series(value, index=df.index).astype('Float64').fillna(0) for name, value in values.items()})
+    return df, values
+
+
+def window_metrics(values, groups, stat_type, windows=FORM_WINDOWS):
+
+    """
+    Metrics over the last `window` innings of each row's group, from grouped cumulative sums: the sum over
+    a window is the running sum at the row minus the running sum `window` innings earlier. Groups with fewer
+    innings than the window use all of them.
+    """
+
+    cum = values.groupby(groups).cumsum()
+    metrics = {}
+    for window in windows:
+        sums = cum - cum.groupby(groups).shift(window).fillna(0)
+        ratio = lambda num, den: (sums[num] / sums[den].mask(sums[den] == 0)).astype('float64')
+
+        if stat_type == 'batting':
+            # Not-outs add their runs but no dismissal, so the average is runs per dismissal
+            metrics[f'Bat Avg {window}'] = ratio('runs', 'outs')
+            metrics[f'Bat SR {window}'] = ratio('runs', 'bf') * 100
+        else:
+            metrics[f'Econ {window}'] = ratio('conceded', 'balls') * 6
+
+    return pd.DataFrame(metrics, index=values.index)
+
+
+def player_rows(master_df, player_ids):
+
+    """The rows of the given players, from their partitions or from the flat master."""
+
+    if isinstance(master_df, PartitionedMaster):
+        partitions = [master_df.get(player_id) for player_id in player_ids]
+        partitions = [df for df in partitions if df is not None]
+        return pd.concat(align_categories(*partitions), ignore_index=True) if partitions else None
+
+    return master_df[master_df['Player ID'].isin(player_ids).to_numpy()]
+
+
+def form_rows(master_df, concat_df, stat_type, windows=FORM_WINDOWS):
+
+    """
+    Computes the form rows changed by merging `concat_df` into the master (master_df is the master after the merge).
+    Per player and format, only the innings from the earliest Start Date of the new rows on are recomputed, with
+    the max(windows) - 1 innings before them as context. For appended innings that is just the new rows.
+    """
+
+    # Step 1: Earliest changed date per player and format
+    changed = concat_df.assign(Format=concat_df['Format'].astype(object)).groupby(FORM_GROUP)['Start Date'].min()
+    rows = player_rows(master_df, concat_df['Player ID'].unique())
+    if rows is None or rows.empty:
+        return None
+
+    # Step 2: Innings of the changed groups, in date order, with their position in the group
+    rows, values = innings_values(rows, stat_type)
+    rows = rows.assign(Format=rows['Format'].astype(object))
+    since = pd.MultiIndex.from_frame(rows[FORM_GROUP]).map(changed.to_dict().get)
+    rows, values = rows[pd.notna(since)], values[pd.notna(since)]
+    since = pd.Series(since[pd.notna(since)], index=rows.index).astype('datetime64[ns]')
+
+    groups = rows.groupby(FORM_GROUP, sort=False).ngroup()
+    position = groups.groupby(groups).cumcount()
+    first_changed = (rows['Start Date'] < since).groupby(groups).transform('sum')
+
+    # Step 3: Recompute from the context on, keep the changed innings
+    context = (position >= first_changed - (max(windows) - 1)).to_numpy()
+    metrics = window_metrics(values[context], groups[context], stat_type, windows)
+    keep = (position[context] >= first_changed[context]).to_numpy()
+
+    form = rows[context][keep][FORM_KEYS[:-1]].assign(Stat=stat_type)
+    form = pd.concat([form, metrics[keep]], axis=1)
+    return form
+
+
+def cast_form(df):
+
+    """Gives form rows the layout of FORM_SCHEMA (numpy-backed, metrics of the other stat type missing)."""
+
+    df = df.reindex(columns=FORM_SCHEMA.names)
+    df['Start Date'] = df['Start Date'].astype('datetime64[ns]')
+    return FORM_SCHEMA.cast(df)[0]
+
+
+def like(df, ref):
+
+    """Casts the new rows to the dtypes of the stored table (e.g. Arrow-backed), categories are aligned separately."""
+
+    dtypes = {col: dtype for col, dtype in ref.dtypes.items()
+              if not isinstance(dtype, pd.CategoricalDtype) and col in df.columns and df[col].dtype != dtype}
+    return df.astype(dtypes) if dtypes else df
+
+
+def update_form(form_df, master_df, concat_df, stat_type, windows=FORM_WINDOWS):
+
+    """
+    Updates the form table after new rows of a batting or bowling master were merged.
+
+    Parameters:
+        form_df (pd.DataFrame or PartitionedMaster): The form table, or None to start a new one.
+        master_df (pd.DataFrame or PartitionedMaster): The batting or bowling master after the merge.
+        concat_df (pd.DataFrame): The rows merged in this run (prepare_concat_df() output). Pass the full
+                                  master to compute the form of every innings.
+        stat_type (str): 'batting' or 'bowling'. Other stat types leave the form table as it is.
+
+    Returns:
+        pd.DataFrame or PartitionedMaster: The updated form table (a PartitionedMaster is updated in place).
+    """
+
+    if stat_type not in FORM_COLS or concat_df is None or concat_df.empty or master_df is None:
+        return form_df
+
+    form = form_rows(master_df, concat_df, stat_type, windows)
+    if form is None or form.empty:
+        return form_df
+    form = cast_form(form)
+
+    # Recomputed innings replace their old rows, the form table stays sorted like the masters
+    dedup_keys, sort_keys = ['Stat', 'Inns ID'], ['Player ID', 'Start Date']
+    if isinstance(form_df, PartitionedMaster):
+        for player_id, part in form.groupby('Player ID', sort=False):
+            base = form_df.get(player_id)
+            base = base if base is not None else part.iloc[0:0]
+            form_df.replace(player_id, merge_sorted(*align_categories(base, like(part, base)), dedup_keys, sort_keys))
+        return form_df
+
+    base = form_df if form_df is not None else form.iloc[0:0]
+    return merge_sorted(*align_categories(base, like(form, base)), dedup_keys, sort_keys)
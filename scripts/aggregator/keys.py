@@ -0,0 +1,154 @@
+import pandas as pd
+
+# Bit layout of the packed Inns ID (int64, always positive):
+#   | Player ID: 37 bits | Format: 3 bits | Match ID: 20 bits | Inns: 3 bits |
+# so sorting on Inns ID sorts by player, format, match and innings.
+INNS_BITS = 3
+MATCH_BITS = 20
+FORMAT_BITS = 3
+PLAYER_BITS = 63 - FORMAT_BITS - MATCH_BITS - INNS_BITS
+
+# Format codes, 0 is left unused. Only these formats fit into the packed Inns ID.
+FORMAT_CODES = {'Test': 1, 'ODI': 2, 'T20I': 3}
+FORMAT_NAMES = {code: name for name, code in FORMAT_CODES.items()}
+
+
+def to_int64(series, like):
+
+    """Casts a column to nullable int64, Arrow-backed if the column `like` is Arrow-backed."""
+
+    if isinstance(like.dtype, pd.ArrowDtype):
+        import pyarrow as pa
+        return series.astype(pd.ArrowDtype(pa.int64()))
+    return series.astype('Int64')
+
+
+def match_id_number(match_ids):
+
+    """Converts Match IDs as written by the transformer ('#2742') or as stored in the master (2742) to integers."""
+
+    if pd.api.types.is_integer_dtype(match_ids.dtype):
+        return match_ids
+
+    numbers = match_ids.astype('string').str.lstrip('#').astype('Int64')
+    return to_int64(numbers, like=match_ids)
+
+
+def check_range(name, values, bits):
+
+    """Raises a ValueError naming the values of a key field that don't fit into its bits of the packed Inns ID."""
+
+    bad = values[(values < 0) | (values >= 2 ** bits)]
+    if len(bad):
+        examples = ", ".join(str(value) for value in bad.unique()[:5])
+        raise ValueError(f"{name} out of range for the packed Inns ID: {len(bad)} rows with values like {examples}, "
+                         f"the {bits}-bit field holds 0 to {2 ** bits - 1}")
+
+
+def check_keys(df):
+
+    """
+    Checks that the key fields of a table fit into the packed Inns ID before anything is packed or merged:
+    every Format needs a code in FORMAT_CODES and every Match ID has to fit into MATCH_BITS.
+
+    Raises:
+        ValueError: Naming the formats or Match IDs that don't fit, e.g. a format other than Test, ODI or T20I.
+    """
+
+    formats = df['Format'].astype('category')
+    unknown = formats[formats.notna() & ~formats.isin(list(FORMAT_CODES))]
+    if len(unknown):
+        counts = ", ".join(f"{value!r} ({count} rows)" for value, count in unknown.astype(object).value_counts().items())
+        raise ValueError(f"Formats {counts} have no code in the packed Inns ID, "
+                         f"only {', '.join(FORMAT_CODES)} can be aggregated")
+
+    check_range('Match ID', match_id_number(df['Match ID']).astype('Int64').dropna(), MATCH_BITS)
+
+
+def pack_inns_id(df):
+
+    """
+    Packs 'Player ID', 'Format', 'Match ID' and 'Inns' into one int64 Inns ID per row, vectorized.
+    Rows with a missing Player ID, Format or Match ID get a missing Inns ID. A missing Inns is packed as 0.
+
+    Parameters:
+        df (pd.DataFrame): Rows with the four key columns, Match ID as '#2742' or 2742.
+
+    Returns:
+        pd.Series: The packed Inns IDs (Int64).
+
+    Raises:
+        ValueError: If a key field doesn't fit (see check_keys()).
+    """
+
+    check_keys(df)
+
+    player = pd.to_numeric(df['Player ID']).astype('Int64')
+    # Mapped per category rather than per row
+    fmt = df['Format'].astype('category').map(FORMAT_CODES).astype('Int64')
+    match = match_id_number(df['Match ID']).astype('Int64')
+    inns = df['Inns'].astype('Int64').fillna(0)
+
+    check_range('Player ID', player.dropna(), PLAYER_BITS)
+    check_range('Inns', inns, INNS_BITS)
+
+    inns_id = ((player * 2 ** FORMAT_BITS + fmt) * 2 ** MATCH_BITS + match) * 2 ** INNS_BITS + inns
+    return inns_id.rename('Inns ID')
+
+
+def unpack_inns_id(inns_id):
+
+    """
+    Splits packed Inns IDs back into their fields.
+
+    Returns:
+        pd.DataFrame: 'Player ID', 'Format', 'Match ID' and 'Inns' (missing Inns as NA), aligned with `inns_id`.
+    """
+
+    inns_id = inns_id.astype('Int64')
+    inns = inns_id % 2 ** INNS_BITS
+    match = (inns_id // 2 ** INNS_BITS) % 2 ** MATCH_BITS
+    fmt = (inns_id // 2 ** (INNS_BITS + MATCH_BITS)) % 2 ** FORMAT_BITS
+    player = inns_id // 2 ** (INNS_BITS + MATCH_BITS + FORMAT_BITS)
+
+    return pd.DataFrame({
+        'Player ID': player,
+        'Format': fmt.astype(object).map(FORMAT_NAMES),
+        'Match ID': match,
+        'Inns': inns.mask(inns == 0)
+    }, index=inns_id.index)
+
+
+def inns_label(inns_id):
+
+    """Human-readable Inns IDs for the dashboard, e.g. '253802_ODI#2742_1' (the format used before packing)."""
+
+    fields = unpack_inns_id(inns_id)
+    label = (fields['Player ID'].astype('string') + "_" + fields['Format'].astype('string') + "#" +
+             fields['Match ID'].astype('string') + "_" + fields['Inns'].astype('string').fillna('<NA>'))
+    return label.rename('Inns ID')
+
+
+def migrate_keys(df):
+
+    """
+    Converts a master table with the old string keys ('#2742' Match IDs, '253802_ODI#2742_1' Inns IDs)
+    to integer Match IDs and packed Inns IDs. Tables that are already migrated are returned as they are.
+    """
+
+    if df is None or 'Match ID' not in df.columns:
+        return df
+
+    # Tables read with the integer keys of the master schemas are left as they are
+    if pd.api.types.is_integer_dtype(df['Match ID'].dtype) and \
+            ('Inns ID' not in df.columns or pd.api.types.is_integer_dtype(df['Inns ID'].dtype)):
+        return df
+
+    df = df.copy()
+    df['Match ID'] = match_id_number(df['Match ID'])
+    if 'Player ID' in df.columns:
+        df['Player ID'] = to_int64(df['Player ID'], like=df['Match ID'])
+    if 'Inns ID' in df.columns and not pd.api.types.is_integer_dtype(df['Inns ID'].dtype):
+        df['Inns ID'] = to_int64(pack_inns_id(df), like=df['Inns ID'])
+
+    return df
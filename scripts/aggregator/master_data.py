@@ -0,0 +1,341 @@
+import uuid
+import pandas as pd
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from loader import LoadData
+from transformer.schema import SCHEMAS, Schema, Column
+from .partitioned import PartitionedMaster, partition_key
+from .keys import migrate_keys
+from .form import FORM_SCHEMA
+from .summary import build_summary
+
+# Master tables stored per Player ID by a partitioned MasterData, the others stay one file
+PARTITIONED_STATS = ["batting", "bowling", "fielding", "allround", "personal_info", "form"]
+
+
+def master_schema(schema):
+
+    """
+    The master layout of a tf table: the integer Match ID and the Player ID and Inns ID keys added by the
+    aggregator, all Int64. Files still stored with the old string keys are read with the tf schema and
+    migrated on download (see migrate_keys()).
+    """
+
+    columns = [Column('Match ID', 'Int64', nullable=False) if col.name == 'Match ID' else col for col in schema.columns]
+    columns += [Column('Player ID', 'Int64', nullable=False), Column('Inns ID', 'Int64', nullable=False)]
+    return Schema(schema.stat_type, columns, fallback=schema)
+
+
+# Master tables read and written with their schema dtypes: the tf tables with integer keys plus the form table
+MASTER_SCHEMAS = dict({stat_type: master_schema(schema) for stat_type, schema in SCHEMAS.items()}, form=FORM_SCHEMA)
+
+# Master tables that Aggregator.changes can hold a delta for, written under master/_changes/<stat type>/
+CHANGE_STATS = ["batting", "bowling", "fielding", "allround", "personal_info"]
+
+# Tables only the master has, loaded after the stat tables
+MASTER_TABLES = ["career_summary", "form"]
+
+# Master table of each stat type the career summary sums
+SUMMARY_ATTRS = {"batting": "battingstats", "bowling": "bowlingstats", "fielding": "fieldingstats"}
+
+
+class MasterData(LoadData):
+
+    def __init__(self, dtype_backend="numpy_nullable", partitioned=False):
+
+        """
+        Initialize the loader of the master tables under master/. The S3 reads and writes are the ones of
+        LoadData; on top of them the master tables are typed by their schema, migrated to the integer keys
+        of keys.py, optionally kept as one file per Player ID, and the career summary, form and change
+        tables of the aggregator are loaded with them.
+
+        Parameters:
+            dtype_backend (str): 'numpy_nullable' or 'pyarrow' (Arrow-backed columns, see LoadData).
+            partitioned (bool): Keep the master tables as one file per Player ID (master/batting/<player id>.csv)
+                                and load them as PartitionedMaster objects.
+        """
+
+        super().__init__(data_type="tf", master=True, dtype_backend=dtype_backend, schemas=MASTER_SCHEMAS)
+
+        self.career_summary = None
+        self.form = None
+        self.changes = None  # {stat type: change rows} of the last aggregation run
+
+        # Partitioned master: the Player IDs to download (None downloads every partition)
+        self.partitioned = partitioned
+        self.player_ids = None
+
+        self.file_name_map.update({
+            "career_summary": "career_summary.csv",
+            "form": "form.csv"
+        })
+
+    def get_partition_key(self, stat_type, player_id):
+        return f"master/{stat_type}/{partition_key(player_id)}.csv"
+
+    def get_changes_key(self, stat_type, run_id):
+        return f"master/_changes/{stat_type}/{run_id}.csv"
+
+    def upload_df(self, bucket_name, stat_type, df, object_key=None):
+
+        """
+        Uploads a master table, a PartitionedMaster partition by partition. A table whose download failed
+        isn't uploaded, since it would overwrite the stored table with the rows of this run only; neither is
+        a flat table on a partitioned loader, since it would be written next to the partitions.
+        """
+
+        if object_key is None and stat_type in self.failed:
+            print(f"Error: the {stat_type} download failed, skipping its upload so the stored table is kept.")
+            return None
+
+        if isinstance(df, PartitionedMaster):
+            return self.upload_partitions(bucket_name, stat_type, df)
+
+        if object_key is None and self.partitioned and stat_type in PARTITIONED_STATS and df is not None:
+            print(f"Error: {stat_type} is not a PartitionedMaster on a partitioned loader, skipping its upload.")
+            return None
+
+        return super().upload_df(bucket_name, stat_type, df, object_key=object_key)
+
+    def download_df(self, bucket_name, stat_type, dtype=None, object_key=None):
+
+        """
+        Downloads a master table, as a PartitionedMaster for a partitioned loader. Tables still stored
+        with the old string keys ('#2742' Match IDs) are migrated to integer keys on read.
+        """
+
+        if self.partitioned and object_key is None and stat_type in PARTITIONED_STATS:
+            return self.download_partitions(bucket_name, stat_type, self.player_ids)
+
+        df = super().download_df(bucket_name, stat_type, dtype=dtype, object_key=object_key)
+        return migrate_keys(df) if stat_type in self.schemas else df
+
+    def upload_partitions(self, bucket_name, stat_type, master_df, dirty_only=True, workers=8):
+
+        """
+        Uploads the partitions of a PartitionedMaster, one CSV per Player ID under master/<stat_type>/.
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+            stat_type (str): Type of stats ('batting', 'bowling', 'fielding', 'allround', 'personal_info', 'form').
+            master_df (PartitionedMaster): The partitioned master table.
+            dirty_only (bool): Only upload the partitions replaced since the last upload.
+            workers (int): Number of partitions uploaded at the same time.
+        """
+
+        keys = [key for key in master_df.player_ids() if not dirty_only or key in master_df.dirty]
+        if not keys:
+            print(f"No changed {stat_type} partitions, skipping upload.")
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda key: LoadData.upload_df(self, bucket_name, stat_type, master_df.partitions[key],
+                                                              object_key=self.get_partition_key(stat_type, key)), keys))
+
+        master_df.dirty.difference_update(keys)
+        print(f" Uploaded {len(keys)} {stat_type} partitions to s3://{bucket_name}/master/{stat_type}/")
+
+    def download_partitions(self, bucket_name, stat_type, player_ids=None, workers=8):
+
+        """
+        Downloads the partitions of a master table into a PartitionedMaster.
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+            stat_type (str): Type of stats ('batting', 'bowling', 'fielding', 'allround', 'personal_info', 'form').
+            player_ids (list): Player IDs to download, e.g. only the player being aggregated.
+                               None downloads every partition.
+            workers (int): Number of partitions downloaded at the same time.
+
+        Returns:
+            PartitionedMaster: The downloaded partitions. Players without a partition are left out. A table
+                               stored flat comes back whole, split into partitions, or None if its
+                               download failed.
+        """
+
+        # Step 1: List the stored partitions, so missing players aren't reported as download errors
+        self.failed.discard(stat_type)
+        stored = self.list_csv(bucket_name, f"master/{stat_type}/")
+        if stored is None:
+            self.failed.add(stat_type)
+            return None
+        stored = set(stored)
+
+        # Step 2: A table still stored flat (master/batting_stats.csv) is migrated: split into partitions that are
+        # all marked for upload, so the stored rows aren't dropped for partitions of this run's players only
+        if not stored:
+            flat_df = super().download_df(bucket_name, stat_type)
+            if stat_type in self.failed:
+                return None
+            if flat_df is not None:
+                master_df = PartitionedMaster.from_frame(stat_type, migrate_keys(flat_df))
+                master_df.dirty.update(master_df.player_ids())
+                print(f" Migrating the flat {stat_type} master to {len(master_df.partitions)} partitions under master/{stat_type}/")
+                return master_df
+
+        # Step 3: Download the requested partitions
+        keys = sorted(stored) if player_ids is None else [key for key in map(partition_key, player_ids) if key in stored]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(lambda key: self.download_df(bucket_name, stat_type,
+                                                                    object_key=self.get_partition_key(stat_type, key)), keys))
+
+        # Step 4: A listed partition that didn't download fails the table (download_df() marks it), it
+        # would otherwise look like a player without rows
+        return PartitionedMaster(stat_type, {key: df for key, df in zip(keys, frames) if df is not None})
+
+    def upload_changes(self, bucket_name, changes, run_time=None):
+
+        """
+        Uploads the delta of an aggregation run (Aggregator.changes) as one small CSV per stat type,
+        e.g. master/_changes/batting/20250101T060000123456Z-1a2b3c4d.csv. Run IDs start with the UTC time
+        of the run, so listing the prefix gives the runs in order.
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+            changes (dict): stat type -> change rows ('Change' column and row images, see changes.py).
+            run_time (datetime): Time of the run, now (UTC) by default.
+
+        Returns:
+            str: The run ID, or None if there were no changes.
+        """
+
+        changes = {stat: df for stat, df in (changes or {}).items() if df is not None and not df.empty}
+        if not changes:
+            print("No changes to upload.")
+            return None
+
+        run_time = run_time or datetime.now(timezone.utc)
+        run_id = f"{run_time:%Y%m%dT%H%M%S%f}Z-{uuid.uuid4().hex[:8]}"
+        for stat_type, df in changes.items():
+            self.upload_df(bucket_name, stat_type, df, object_key=self.get_changes_key(stat_type, run_id))
+
+        return run_id
+
+    def download_changes(self, bucket_name, stat_type="all", since=None):
+
+        """
+        Downloads the deltas written by upload_changes(), for consumers that keep a copy of the masters
+        up to date instead of reloading them (see changes.apply_changes()).
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+            stat_type (str): Type of stats ('all', 'batting', 'bowling', 'fielding', 'allround', 'personal_info').
+            since (str): The last run ID already applied, only later runs are downloaded. None downloads all of them.
+
+        Returns:
+            dict: stat type -> change rows of the runs in order, with a 'Run ID' column. Stat types without changes are left out.
+        """
+
+        changes = {}
+        for name in CHANGE_STATS:
+            if stat_type not in ["all", name]:
+                continue
+
+            run_ids = self.list_csv(bucket_name, f"master/_changes/{name}/")
+            if run_ids is None:
+                continue
+
+            frames = []
+            for run_id in sorted(run_id for run_id in run_ids if since is None or run_id > since):
+                df = self.download_df(bucket_name, name, object_key=self.get_changes_key(name, run_id))
+                if df is not None:
+                    frames.append(df.assign(**{"Run ID": run_id}))
+
+            if frames:
+                changes[name] = pd.concat(frames, ignore_index=True)
+
+        return changes
+
+    def build_summary(self, bucket_name):
+
+        """
+        Builds the career summary from the full batting, bowling and fielding masters, for masters stored
+        before the summary existed. Updating a missing summary would only add the delta of a run, so an
+        all-zero summary would be uploaded over the real sums. Flat tables already downloaded are used as
+        they are; partitioned ones are downloaded with every partition, not only those of self.player_ids.
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            pd.DataFrame: The career summary, or None if the masters have no rows or a master download failed
+                          (career_summary is then marked failed, so it isn't uploaded).
+        """
+
+        print("No career summary stored, building it from the full masters...")
+        failed = set(self.failed)
+        masters = {}
+
+        for stat, attr in SUMMARY_ATTRS.items():
+            df = getattr(self, attr)
+            if self.partitioned:
+                df = df if self.player_ids is None and df is not None else self.download_partitions(bucket_name, stat)
+            elif df is None:
+                df = self.download_df(bucket_name, stat)
+            masters[stat] = df
+
+        # A master missing rows would give a wrong summary. Downloads made here only decide the summary, the
+        # stat tables keep the state of their own download
+        missing = [stat for stat in SUMMARY_ATTRS if stat in self.failed]
+        self.failed = failed
+        if missing:
+            print(f"Error: the {', '.join(missing)} download failed, the career summary can't be built.")
+            self.failed.add("career_summary")
+            return None
+
+        summary_df = build_summary(masters)
+        if summary_df is not None:
+            print(f" Built the career summary: {len(summary_df)} rows")
+        return summary_df
+
+    def load_data(self, bucket_name, load_type, stat_type="all"):
+
+        """
+        Loads the master tables to/from S3: the stat tables through LoadData.load_data(), then the
+        career_summary and form tables. On upload the changes in self.changes for the selected stat
+        types are written last, so consumers that see them find the masters already updated.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            load_type (str): Type of load operation ('upload' or 'download').
+            stat_type (str): Type of stats to load ('all', 'batting', 'bowling', 'fielding', 'allround', 'personal_info',
+                             'career_summary', 'form').
+        """
+
+        if load_type not in ["upload", "download"]:
+            print(f"Invalid load type '{load_type}'. Must be 'upload' or 'download'.")
+            return
+
+        if stat_type not in ["all"] + CHANGE_STATS + MASTER_TABLES:
+            print(f"Invalid stat type '{stat_type}'. Must be 'all', 'batting', 'bowling', 'fielding', 'allround', 'personal_info', 'career_summary', or 'form'.")
+            return
+
+        if stat_type not in MASTER_TABLES:
+            super().load_data(bucket_name, load_type, stat_type)
+
+        tables = [name for name in MASTER_TABLES if stat_type in ["all", name]]
+
+        if load_type == "upload":
+            if stat_type in MASTER_TABLES:
+                self.ensure_bucket_exists(bucket_name, flag=1)
+
+            for name in tables:
+                if getattr(self, name) is not None:
+                    self.upload_df(bucket_name, name, getattr(self, name))
+
+            if self.changes:
+                uploaded = [name for name in self.changes if stat_type in ["all", name]]
+                self.upload_changes(bucket_name, {name: self.changes[name] for name in uploaded})
+                self.changes = {name: df for name, df in self.changes.items() if name not in uploaded}
+
+        elif load_type == "download":
+            if stat_type in MASTER_TABLES:
+                self.ensure_bucket_exists(bucket_name)
+
+            for name in tables:
+                setattr(self, name, self.download_df(bucket_name, name))
+
+            # A summary that failed to download stays None and marked failed, so it isn't uploaded. One that
+            # isn't stored yet is built from the full masters, the runs only add their delta to it
+            if "career_summary" in tables and self.career_summary is None and "career_summary" not in self.failed:
+                self.career_summary = self.build_summary(bucket_name)
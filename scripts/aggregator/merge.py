@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+
+def key_arrays(df, sort_keys):
+
+    """
+    Returns the sort key columns of `df` as numpy arrays, or None if they can't be merged without a
+    full sort: more than two keys, missing values, or columns that aren't numbers or dates.
+    """
+
+    if len(sort_keys) > 2:
+        return None
+
+    arrays = []
+    for key in sort_keys:
+        col = df[key]
+        if isinstance(col.dtype, pd.CategoricalDtype) or col.isna().any():
+            return None
+
+        values = col.to_numpy()
+        if values.dtype.kind not in 'iufM':
+            return None
+        arrays.append(values)
+
+    return arrays
+
+
+def is_sorted(arrays):
+
+    """Checks in one pass that the rows are ordered by the first key, then by the second."""
+
+    first = arrays[0]
+    if len(first) < 2:
+        return True
+    if len(arrays) == 1:
+        return bool((first[1:] >= first[:-1]).all())
+
+    second = arrays[1]
+    return bool(((first[1:] > first[:-1]) | ((first[1:] == first[:-1]) & (second[1:] >= second[:-1]))).all())
+
+
+def insert_positions(master_keys, concat_keys):
+
+    """
+    Position in the master of each new row (both sides sorted), after the master rows with the same keys.
+    With two keys, each run of new rows with the same first key (one player) is placed with a binary search
+    in that player's block of the master, or straight after it when all of them come after its last row.
+    """
+
+    master_first, concat_first = master_keys[0], concat_keys[0]
+    if len(master_keys) == 1:
+        return np.searchsorted(master_first, concat_first, side='right')
+
+    master_second, concat_second = master_keys[1], concat_keys[1]
+    positions = np.empty(len(concat_first), dtype=np.int64)
+
+    starts = np.flatnonzero(np.r_[True, concat_first[1:] != concat_first[:-1]])
+    ends = np.r_[starts[1:], len(concat_first)]
+    lows = np.searchsorted(master_first, concat_first[starts], side='left')
+    highs = np.searchsorted(master_first, concat_first[starts], side='right')
+
+    for start, end, low, high in zip(starts, ends, lows, highs):
+        if low == high or concat_second[start] >= master_second[high - 1]:
+            # Append-only: the player's new rows all come after its last row in the master
+            positions[start:end] = high
+        else:
+            positions[start:end] = low + np.searchsorted(master_second[low:high], concat_second[start:end], side='right')
+
+    return positions
+
+
+def merge_sorted(master_df, concat_df, dedup_keys, sort_keys):
+
+    """
+    Merges new rows into a master table that is already sorted on `sort_keys`, without re-sorting it.
+    Gives the same result as pd.concat([master_df, concat_df]).drop_duplicates(dedup_keys, keep='last')
+    .sort_values(sort_keys).reset_index(drop=True): new rows replace master rows with the same keys and
+    come after master rows with equal sort keys. Falls back to that when the sort keys don't allow a merge.
+
+    Parameters:
+        master_df (pd.DataFrame): The master rows, sorted on `sort_keys`.
+        concat_df (pd.DataFrame): The new rows, with the same columns and dtypes.
+        dedup_keys (list): The keys to use for dropping duplicates.
+        sort_keys (list): One or two keys the master is sorted on.
+    """
+
+    # Step 1: Dedup in one hash pass, the last occurrence wins like drop_duplicates(keep='last')
+    n_master = len(master_df)
+    duplicated = pd.concat([master_df[dedup_keys], concat_df[dedup_keys]], ignore_index=True)\
+                   .duplicated(keep='last').to_numpy()
+    if duplicated.any():
+        master_df, concat_df = master_df[~duplicated[:n_master]], concat_df[~duplicated[n_master:]]
+
+    # Step 2: Check that both sides can be merged on their keys. sort_values() on a single key isn't stable,
+    # so that case is only merged when the key is also the dedup key and can't have ties
+    master_keys, concat_keys = key_arrays(master_df, sort_keys), key_arrays(concat_df, sort_keys)
+    if master_keys is None or concat_keys is None or not is_sorted(master_keys) or \
+       any(m.dtype.kind != c.dtype.kind for m, c in zip(master_keys, concat_keys)) or \
+       (len(sort_keys) == 1 and list(sort_keys) != list(dedup_keys)):
+        return pd.concat([master_df, concat_df]).sort_values(by=sort_keys).reset_index(drop=True)
+
+    if concat_df.empty:
+        return master_df.reset_index(drop=True)
+
+    # The new rows usually arrive in order already; if not only they are sorted (stable, like sort_values)
+    if not is_sorted(concat_keys):
+        concat_df = concat_df.sort_values(by=sort_keys, kind='stable')
+        concat_keys = key_arrays(concat_df, sort_keys)
+
+    # Step 3: Interleave the new rows at their positions in one take
+    positions = insert_positions(master_keys, concat_keys)
+    merged = pd.concat([master_df, concat_df], ignore_index=True)
+    n_master, n_concat = len(master_df), len(concat_df)
+
+    if positions[0] == n_master:
+        return merged
+
+    slots = positions + np.arange(n_concat)
+    order = np.empty(n_master + n_concat, dtype=np.int64)
+    order[slots] = np.arange(n_master, n_master + n_concat)
+    master_slots = np.ones(n_master + n_concat, dtype=bool)
+    master_slots[slots] = False
+    order[master_slots] = np.arange(n_master)
+
+    return merged.take(order).reset_index(drop=True)
@@ -0,0 +1,129 @@
+import pandas as pd
+from transformer.categories import align_categories
+
+
+def partition_key(player_id):
+
+    """Key of a player's partition: the Player ID as a string, so 253802 and '253802' are the same partition."""
+
+    return str(player_id)
+
+
+def partition_order(key):
+
+    # Numeric Player IDs in numeric order, like sort_values() on the flat master
+    return (0, int(key), "") if key.isdigit() else (1, 0, key)
+
+
+def staged(df):
+
+    """A copy of a master table that a merge can change without changing the table itself."""
+
+    return df.copy() if isinstance(df, PartitionedMaster) else df
+
+
+def commit(df, new_df):
+
+    """
+    The table to keep after a merge into staged(df) succeeded. A PartitionedMaster takes over the replaced
+    partitions with update(), so it stays the same object for the readers holding it (e.g. a MasterStore).
+    """
+
+    if isinstance(df, PartitionedMaster) and isinstance(new_df, PartitionedMaster):
+        df.update(new_df)
+        return df
+    return new_df
+
+
+class PartitionedMaster:
+
+    def __init__(self, stat_type, partitions=None):
+
+        """
+        Initialize a master table held as one DataFrame per Player ID. Aggregating a player only
+        replaces that player's partition, the other partitions are neither copied nor re-sorted,
+        so the cost of one player doesn't depend on the size of the master.
+
+        Parameters:
+            stat_type (str): The type of statistics ('batting', 'bowling', 'fielding', 'allround', 'personal_info').
+            partitions (dict): Player ID -> DataFrame with that player's rows.
+        """
+
+        self.stat_type = stat_type
+        self.partitions = {partition_key(player_id): df for player_id, df in (partitions or {}).items()}
+
+        # Partitions replaced since the last upload, MasterData only writes these back
+        self.dirty = set()
+
+    @classmethod
+    def from_frame(cls, stat_type, df):
+
+        """Splits a flat master table (e.g. master/batting_stats.csv) into its Player ID partitions."""
+
+        master = cls(stat_type)
+        if df is None or df.empty:
+            return master
+
+        for player_id, part in df.groupby('Player ID', sort=False):
+            master.partitions[partition_key(player_id)] = part.reset_index(drop=True)
+
+        return master
+
+    def get(self, player_id):
+
+        """Returns the partition of a player, or None if the player isn't in the master yet."""
+
+        return self.partitions.get(partition_key(player_id))
+
+    def replace(self, player_id, df):
+
+        """Replaces the partition of a player with `df` and marks it for upload."""
+
+        if df is None:
+            return
+
+        key = partition_key(player_id)
+        self.partitions[key] = df
+        self.dirty.add(key)
+
+    def copy(self):
+
+        """A copy sharing the partition DataFrames: replacing a partition of the copy leaves this master as it is."""
+
+        master = PartitionedMaster(self.stat_type)
+        master.partitions = dict(self.partitions)
+        return master
+
+    def update(self, other):
+
+        """Takes over the partitions that `other` (a copy() of this master) replaced, and marks them for upload."""
+
+        for key, df in other.partitions.items():
+            if self.partitions.get(key) is not df:
+                self.replace(key, df)
+
+    def player_ids(self):
+        return sorted(self.partitions, key=partition_order)
+
+    def __len__(self):
+        return sum(len(df) for df in self.partitions.values())
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def to_frame(self):
+
+        """
+        Concatenates the partitions into one flat table, ordered by Player ID. Only needed by readers of
+        the whole master, aggregation works on the partitions.
+
+        Returns:
+            pd.DataFrame: The flat master table, or None if there are no partitions.
+        """
+
+        frames = [self.partitions[key] for key in self.player_ids()]
+        if not frames:
+            return None
+
+        return pd.concat(align_categories(*frames), ignore_index=True)
@@ -0,0 +1,278 @@
+import itertools
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from transformer.categories import align_categories
+from .aggregator import Aggregator
+from .batch import MASTER_ATTRS
+from .partitioned import PartitionedMaster, partition_key, partition_order
+
+# Master tables on an Aggregator, for stores built over one
+STORE_ATTRS = {
+    'batting': 'batting_master',
+    'bowling': 'bowling_master',
+    'fielding': 'fielding_master',
+    'allround': 'allround_master'
+}
+
+# Query filters and the master columns they match
+FILTER_COLS = {
+    'player_id': 'Player ID',
+    'format': 'Format',
+    'opposition': 'Opposition',
+    'location': 'Location'
+}
+
+# Lower date bound when only an end date is given, so rows without a Start Date (NaT) are left out like in a mask
+MIN_DATE = np.iinfo(np.int64).min + 1
+
+
+def date_values(df):
+
+    """The Start Dates of a master table as int64 nanoseconds, NaT as the smallest int64."""
+
+    return pd.to_datetime(df['Start Date']).astype('datetime64[ns]').to_numpy().view(np.int64)
+
+
+def date_bound(value):
+    return None if value is None else np.datetime64(pd.Timestamp(value), 'ns').view(np.int64)
+
+
+def filter_values(value):
+
+    """Filter values as a tuple of strings, so 253802 and '253802' (or a category and its label) match."""
+
+    values = value if isinstance(value, (list, tuple, set, pd.Index, pd.Series, np.ndarray)) else [value]
+    return tuple(sorted({str(v) for v in values}))
+
+
+class GroupIndex:
+
+    def __init__(self, df, cols):
+
+        """
+        Index of a master table for queries on the columns `cols` and a date range: the row positions ordered
+        by group, then by Start Date, and the offsets of every group in that order. A group is found with one
+        dict lookup and its date range with two binary searches, so a query costs O(log n + k) for k rows.
+
+        Parameters:
+            df (pd.DataFrame): The master table (or one partition of it).
+            cols (tuple): The filter columns, e.g. ('Player ID', 'Format'). Empty for date-only queries.
+        """
+
+        dates = date_values(df)
+        if cols:
+            codes = df.groupby(list(cols), sort=False, observed=True, dropna=True).ngroup().fillna(-1).to_numpy(np.int64)
+        else:
+            codes = np.zeros(len(df), dtype=np.int64)
+
+        # Rows with a missing filter value don't belong to any group
+        rows = np.flatnonzero(codes >= 0)
+        self.order = rows[np.lexsort((dates[rows], codes[rows]))]
+        self.dates = dates[self.order]
+
+        sorted_codes = codes[self.order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(self.order) else self.order[:0]
+        ends = np.r_[starts[1:], len(self.order)]
+
+        keys = df[list(cols)].iloc[self.order[starts]].itertuples(index=False, name=None) if cols else [()]
+        self.offsets = {tuple(str(v) for v in key): (start, end) for key, start, end in zip(keys, starts, ends)}
+
+    def positions(self, key, start=None, end=None):
+
+        """Row positions of one group with a Start Date between `start` and `end` (int64 ns, both included)."""
+
+        if key not in self.offsets:
+            return self.order[:0]
+
+        first, last = self.offsets[key]
+        if start is None and end is None:
+            return self.order[first:last]
+
+        dates = self.dates[first:last]
+        low = np.searchsorted(dates, start if start is not None else MIN_DATE, side='left')
+        high = np.searchsorted(dates, end, side='right') if end is not None else len(dates)
+        return self.order[first + low:first + high]
+
+
+class MasterStore:
+
+    def __init__(self, source, maxsize=128):
+
+        """
+        Initialize a query layer over the batting, bowling, fielding and allround masters. Queries by player,
+        format, opposition, location and date range go through indexes built once per table (or partition)
+        instead of boolean scans over every row, and their results are kept in an LRU cache.
+
+        The store reads the masters from `source` on every query. When run_agg() replaces a master table or
+        a partition, the indexes and cached results that depend on it are dropped before the next query.
+
+        Parameters:
+            source: An Aggregator (batting_master, ...) or a MasterData (battingstats, ...).
+                    The masters can be DataFrames or PartitionedMaster.
+            maxsize (int): The number of query results kept in the cache.
+        """
+
+        self.source = source
+        self.maxsize = maxsize
+
+        # query -> (result, partitions it was read from or None for the whole table)
+        self.cache = OrderedDict()
+        # (stat_type, partition, filter columns) -> GroupIndex
+        self.indexes = {}
+        # (stat_type, partition) -> the table or partition the indexes were built on, None for the whole table
+        self.frames = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def master(self, stat_type):
+
+        """Returns the current master table of a stat type from the source."""
+
+        if stat_type not in STORE_ATTRS:
+            raise ValueError(f"Unknown stat type {stat_type!r}, expected one of {list(STORE_ATTRS)}")
+
+        attrs = STORE_ATTRS if isinstance(self.source, Aggregator) else MASTER_ATTRS
+        return getattr(self.source, attrs[stat_type], None)
+
+    def invalidate(self, stat_type=None, player_id=None):
+
+        """
+        Drops the indexes and cached results of a stat type (all of them if None), or only those that
+        depend on one player's partition. Called for the tables and partitions replaced since the last
+        query; call it directly after changing a master DataFrame in place.
+        """
+
+        key = partition_key(player_id) if player_id is not None else None
+
+        matches = lambda stat: stat_type is None or stat == stat_type
+
+        # Results and indexes of the whole table (partition None) read every partition, so they go as well
+        for query in list(self.cache):
+            parts = self.cache[query][1]
+            if matches(query[0]) and (key is None or parts is None or key in parts):
+                del self.cache[query]
+
+        for stat, part, cols in list(self.indexes):
+            if matches(stat) and (key is None or part is None or part == key):
+                del self.indexes[(stat, part, cols)]
+
+        # The table itself is only forgotten when the whole stat type is invalidated
+        for stat, part in list(self.frames):
+            if matches(stat) and (key is None or part == key):
+                del self.frames[(stat, part)]
+
+    def refresh(self, stat_type, player_keys=None):
+
+        """
+        Checks the master table (and the partitions of `player_keys`, all of them if None) against the ones
+        the store has indexed, and invalidates what changed. Tables and partitions are compared by identity:
+        merge_df() and PartitionedMaster.replace() always put a new DataFrame in place.
+
+        Returns:
+            The master table of the stat type.
+        """
+
+        master_df = self.master(stat_type)
+        if self.frames.get((stat_type, None)) is not master_df:
+            self.invalidate(stat_type)
+            self.frames[(stat_type, None)] = master_df
+
+        if isinstance(master_df, PartitionedMaster):
+            indexed = {part for stat, part in self.frames if stat == stat_type and part is not None}
+            keys = player_keys if player_keys is not None else indexed | set(master_df.partitions)
+            for key in keys:
+                if self.frames.get((stat_type, key)) is not master_df.partitions.get(key):
+                    self.invalidate(stat_type, key)
+                    self.frames[(stat_type, key)] = master_df.partitions.get(key)
+
+        return master_df
+
+    def index(self, stat_type, part, df, cols):
+
+        """Returns the index of a table or partition on the filter columns, built on first use."""
+
+        key = (stat_type, part, cols)
+        if key not in self.indexes:
+            self.indexes[key] = GroupIndex(df, cols)
+        return self.indexes[key]
+
+    def positions(self, stat_type, part, df, filters, start, end):
+
+        """Sorted row positions matching the filters: the union of one index lookup per combination of values."""
+
+        cols = tuple(filters)
+        index = self.index(stat_type, part, df, cols)
+        found = [index.positions(key, start, end) for key in itertools.product(*filters.values())]
+        found = np.concatenate(found) if len(found) > 1 else found[0]
+
+        # Back in master order, like a boolean mask would return them. The rows of one player come out of
+        # the index in that order already, since the master is sorted by Player ID and Start Date
+        return found if len(found) < 2 or (found[1:] > found[:-1]).all() else np.sort(found)
+
+    def query(self, stat_type, player_id=None, format=None, opposition=None, location=None, start=None, end=None):
+
+        """
+        Returns the master rows matching all the given filters, in master order, like filtering the master
+        with a boolean mask but without scanning it.
+
+        Parameters:
+            stat_type (str): The type of statistics ('batting', 'bowling', 'fielding', 'allround').
+            player_id: A Player ID or a list of them.
+            format: A format ('Test', 'ODI', 'T20I') or a list of them.
+            opposition: An opposition or a list of them.
+            location: A location or a list of them.
+            start: The first Start Date to include (anything pd.Timestamp() accepts).
+            end: The last Start Date to include.
+
+        Returns:
+            pd.DataFrame: The matching rows with their master index, or None if there is no master table.
+        """
+
+        arguments = {'player_id': player_id, 'format': format, 'opposition': opposition, 'location': location}
+        filters = {FILTER_COLS[name]: filter_values(value) for name, value in arguments.items() if value is not None}
+        start, end = date_bound(start), date_bound(end)
+
+        # Step 1: Drop what changed since the last query, then look the query up in the cache
+        players = filters.get('Player ID')
+        master_df = self.refresh(stat_type, players)
+        if master_df is None:
+            return None
+
+        query = (stat_type, tuple(filters.items()), start, end)
+        if query in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(query)
+            return self.cache[query][0].copy()
+        self.misses += 1
+
+        # Step 2: Index lookups, per partition of the queried players (or every partition) on a PartitionedMaster
+        if isinstance(master_df, PartitionedMaster):
+            other_filters = {col: values for col, values in filters.items() if col != 'Player ID'}
+            keys = sorted(players, key=partition_order) if players is not None else master_df.player_ids()
+            frames = []
+            for key in keys:
+                df = master_df.partitions.get(key)
+                if df is not None:
+                    frames.append(df.take(self.positions(stat_type, key, df, other_filters, start, end)))
+
+            # Matching rows, or no rows with the columns of the master
+            frames = [df for df in frames if not df.empty] or frames[:1] or \
+                     [df.iloc[0:0] for df in itertools.islice(master_df.partitions.values(), 1)]
+            result = pd.concat(align_categories(*frames)) if len(frames) > 1 else frames[0] if frames else None
+            parts = set(players) if players is not None else None
+        else:
+            result = master_df.take(self.positions(stat_type, None, master_df, filters, start, end))
+            parts = None
+
+        # Step 3: Keep the result, dropping the least recently used one when the cache is full
+        if result is not None:
+            self.cache[query] = (result, parts)
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+        return result.copy() if result is not None else None
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache), 'maxsize': self.maxsize}
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from transformer.categories import apply_categories
+from .partitioned import PartitionedMaster
+
+SUMMARY_KEYS = ['Player ID', 'Format']
+
+# Additive running sums of the career_summary table, per stat type. Averages, strike rates and
+# economy are ratios of these sums (see career_ratios()), so the table can be updated from deltas.
+SUMMARY_COLS = {
+    'batting': ['Bat Inns', 'Not Outs', 'Outs', 'Runs', 'BF', '4s', '6s', '50s', '100s'],
+    'bowling': ['Bowl Inns', 'Balls', 'Mdns', 'Runs Conceded', 'Wkts'],
+    'fielding': ['Field Inns', 'Ct', 'Field Dis']
+}
+
+# Dismissals that leave the batter not out
+NOT_OUT = ['not out', 'retired notout', 'retired hurt']
+
+
+def overs_to_balls(overs):
+
+    """Converts overs as written on the scorecard (4.3 = 4 overs and 3 balls) to balls."""
+
+    whole = np.floor(overs)
+    return whole * 6 + ((overs - whole) * 10).round()
+
+
+def innings_sums(df, stat_type):
+
+    """
+    Sums the SUMMARY_COLS of a stat type over innings rows, per Player ID and Format.
+
+    Returns:
+        pd.DataFrame: Indexed by (Player ID, Format), one column per running sum.
+    """
+
+    cols = SUMMARY_COLS[stat_type]
+    if df is None or df.empty:
+        return pd.DataFrame(columns=cols, index=pd.MultiIndex.from_tuples([], names=SUMMARY_KEYS), dtype='Int64')
+
+    # Step 1: One value per innings and running sum, missing values count as 0
+    if stat_type == 'batting':
+        runs = df['Runs'].astype('Float64')
+        batted = runs.notna()
+        not_out = df['Dismissal'].astype(object).isin(NOT_OUT)
+        values = {
+            'Bat Inns': batted,
+            'Not Outs': batted & not_out,
+            'Outs': batted & ~not_out & df['Dismissal'].notna(),
+            'Runs': runs,
+            'BF': df['BF'],
+            '4s': df['4s'],
+            '6s': df['6s'],
+            '50s': (runs >= 50) & (runs < 100),
+            '100s': runs >= 100
+        }
+    elif stat_type == 'bowling':
+        overs = df['Overs'].astype('Float64')
+        values = {
+            'Bowl Inns': overs.notna(),
+            'Balls': overs_to_balls(overs),
+            'Mdns': df['Mdns'],
+            'Runs Conceded': df['Runs'],
+            'Wkts': df['Wkts']
+        }
+    else:
+        values = {
+            'Field Inns': df['Dis'].notna() | df['Ct'].notna(),
+            'Ct': df['Ct'],
+            'Field Dis': df['Dis']
+        }
+
+    sums = pd.DataFrame({col: pd.Series(value, index=df.index).astype('Float64').fillna(0) for col, value in values.items()})
+    sums[SUMMARY_KEYS] = df[SUMMARY_KEYS].astype({'Player ID': 'int64', 'Format': object})
+
+    # Step 2: Sum per player and format
+    return sums.groupby(SUMMARY_KEYS)[cols].sum().round().astype('Int64')
+
+
+def replaced_rows(master_df, concat_df, dedup_keys):
+
+    """Returns the master rows that the rows of `concat_df` will replace (same dedup keys), or None."""
+
+    if master_df is None or concat_df is None or concat_df.empty:
+        return None
+
+    if isinstance(master_df, PartitionedMaster):
+        partitions = [master_df.get(player_id) for player_id in concat_df['Player ID'].unique()]
+        partitions = [df for df in partitions if df is not None]
+        if not partitions:
+            return None
+        master_df = pd.concat(partitions, ignore_index=True)
+
+    keys = pd.MultiIndex.from_frame(master_df[dedup_keys]) if len(dedup_keys) > 1 else master_df[dedup_keys[0]]
+    new_keys = pd.MultiIndex.from_frame(concat_df[dedup_keys]) if len(dedup_keys) > 1 else concat_df[dedup_keys[0]]
+    return master_df[np.asarray(keys.isin(new_keys))]
+
+
+def update_summary(summary_df, master_df, concat_df, stat_type, dedup_keys=['Inns ID']):
+
+    """
+    Updates the career_summary table with the new rows of one stat type before they are merged into the master:
+    the sums of the new rows are added and the sums of the master rows they replace are subtracted, so the
+    cost depends on the new rows only.
+
+    Parameters:
+        summary_df (pd.DataFrame): The current career_summary table, or None to start a new one.
+        master_df (pd.DataFrame or PartitionedMaster): The master table before the merge, or None.
+        concat_df (pd.DataFrame): The new rows (prepare_concat_df() output), or a full master table to build
+                                  the summary from scratch (with master_df=None).
+        stat_type (str): 'batting', 'bowling' or 'fielding'. Other stat types leave the summary as it is.
+        dedup_keys (list): The keys new rows replace master rows on.
+
+    Returns:
+        pd.DataFrame: The updated career_summary, one row per Player ID and Format.
+    """
+
+    if stat_type not in SUMMARY_COLS or concat_df is None or concat_df.empty:
+        return summary_df
+
+    # Step 1: Delta of the running sums: new rows minus the old images they replace
+    new_rows = concat_df.drop_duplicates(subset=dedup_keys, keep='last')
+    delta = innings_sums(new_rows, stat_type).sub(innings_sums(replaced_rows(master_df, new_rows, dedup_keys), stat_type), fill_value=0)
+
+    # Step 2: Add the delta to the summary, players and formats seen for the first time start at 0
+    all_cols = [col for cols in SUMMARY_COLS.values() for col in cols]
+    if summary_df is None or summary_df.empty:
+        summary = pd.DataFrame(columns=all_cols, index=delta.index[:0], dtype='Int64')
+    else:
+        summary = summary_df.astype({'Format': object}).set_index(SUMMARY_KEYS)[all_cols]
+
+    summary = summary.reindex(summary.index.union(delta.index)).fillna(0).astype('Int64')
+    summary.loc[delta.index, delta.columns] += delta.astype('Int64')
+
+    summary = apply_categories(summary.reset_index())
+    return summary.sort_values(SUMMARY_KEYS).reset_index(drop=True)
+
+
+def build_summary(masters):
+
+    """
+    Builds the career_summary table from full master tables, e.g. for masters stored before the table
+    existed. Updating a missing summary with the rows of one run would only add their delta, which
+    nets to zero for rows the master already holds.
+
+    Parameters:
+        masters (dict): stat type -> master table (DataFrame, PartitionedMaster holding every partition, or None).
+
+    Returns:
+        pd.DataFrame: The career_summary table, or None if the masters have no rows.
+    """
+
+    summary_df = None
+    for stat_type, master_df in masters.items():
+        if isinstance(master_df, PartitionedMaster):
+            master_df = master_df.to_frame()
+        summary_df = update_summary(summary_df, None, master_df, stat_type)
+
+    return summary_df
+
+
+def career_ratios(summary_df):
+
+    """
+    Adds the career ratios of the running sums: batting average and strike rate, bowling average,
+    economy and strike rate. Ratios with a zero denominator are missing.
+    """
+
+    df = summary_df.copy()
+    ratio = lambda num, den: (df[num] / df[den].replace(0, pd.NA)).astype('Float64')
+
+    df['Bat Avg'] = ratio('Runs', 'Outs')
+    df['Bat SR'] = ratio('Runs', 'BF') * 100
+    df['Bowl Avg'] = ratio('Runs Conceded', 'Wkts')
+    df['Econ'] = ratio('Runs Conceded', 'Balls') * 6
+    df['Bowl SR'] = ratio('Balls', 'Wkts')
+
+    return df
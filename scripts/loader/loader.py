@@ -1,7 +1,9 @@
 import pandas as pd
 import boto3
 from botocore.exceptions import ClientError
-from io import StringIO
+from io import StringIO, BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from dotenv import load_dotenv
 import os
 
@@ -9,9 +11,12 @@ load_dotenv()  # Load AWS credentials from .env
 
 s3 = boto3.client("s3")
 
+# S3 requires every part of a multipart upload except the last one to be at least 5 MB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
 class LoadData:
 
-    def __init__(self, player_name=None, data_type=None, master=False):
+    def __init__(self, player_name=None, data_type=None, master=False, dtype_backend="numpy_nullable", schemas=None):
         
         """
         Initializes the CricketerStatsLoader with player name and data type.
@@ -19,6 +24,10 @@ class LoadData:
             player_name (str): Name of the player.
             data_type (str): Type of data ('raw' or 'tf').
             master (bool): Flag to indicate if the data is for the master sheet.
+            dtype_backend (str): 'numpy_nullable' or 'pyarrow'. With 'pyarrow', the tables in `schemas` are
+                                 read and written by pyarrow's CSV reader/writer as Arrow-backed columns.
+            schemas (dict): stat type -> Schema (e.g. transformer.schema.SCHEMAS) the table is read with, so it
+                            comes back with its dtypes. Tables without a schema are inferred by pd.read_csv.
         """
 
         self.player_name = player_name.lower().replace(" ", "_") if player_name else None
@@ -30,6 +39,11 @@ class LoadData:
         self.player_info = None
 
         self.master = master      
+        self.dtype_backend = dtype_backend
+        self.schemas = schemas or {}
+
+        # Stat types whose last download failed for another reason than a missing file
+        self.failed = set()
 
         # Mapping of stat types to file names
         self.file_name_map = {
@@ -37,7 +51,13 @@ class LoadData:
             "bowling": "bowling_stats.csv",
             "fielding": "fielding_stats.csv",
             "allround": "allround_stats.csv",
-            "personal_info": "personal_info.csv"
+            "personal_info": "personal_info.csv",
+
+            # Raw row hashes of the tf tables, used by incremental transforms
+            "batting_hashes": "batting_row_hashes.csv",
+            "bowling_hashes": "bowling_row_hashes.csv",
+            "fielding_hashes": "fielding_row_hashes.csv",
+            "allround_hashes": "allround_row_hashes.csv"
         }
   
     def get_object_key(self, stat_type):
@@ -72,28 +92,33 @@ class LoadData:
             
             else: raise e
     
-    def upload_df(self, bucket_name, stat_type, df):
+    def upload_df(self, bucket_name, stat_type, df, object_key=None):
 
-        """Uploads a Pandas DataFrame as a CSV file to S3."""
+        """Uploads a Pandas DataFrame as a CSV file to S3 (at `object_key`, the stat type's file by default)."""
     
         if stat_type not in self.file_name_map:
             print(f" Invalid stat_type '{stat_type}'.")
             return None
 
-        object_key = self.get_object_key(stat_type)
+        object_key = object_key or self.get_object_key(stat_type)
 
         if df is None or df.empty:
             print(f"Warning: {stat_type} dataframe is empty, skipping upload.")
             return
 
         try:
-            csv_buffer = StringIO()
-            df.to_csv(csv_buffer, index=False)
+            # Arrow-backed tables are written natively by pyarrow, without object-dtype round-trips
+            if self.dtype_backend == "pyarrow" and stat_type in self.schemas:
+                body = self.schemas[stat_type].to_csv(df)
+            else:
+                csv_buffer = StringIO()
+                df.to_csv(csv_buffer, index=False)
+                body = csv_buffer.getvalue()
 
             s3.put_object(
                 Bucket=bucket_name,
                 Key=object_key,
-                Body=csv_buffer.getvalue(),
+                Body=body,
                 ContentType="text/csv"
             )
             
@@ -103,29 +128,190 @@ class LoadData:
             print(f"Error uploading {stat_type} stats to {bucket_name}/{object_key}: {e}")
             return None
 
-    def download_df(self, bucket_name, stat_type):
+    def upload_stream(self, bucket_name, stat_type, batches, part_size=8 * 1024 * 1024, workers=2):
 
-        """Downloads a cricket stat CSV from S3 into a DataFrame."""
+        """
+        Uploads a stream of DataFrame batches (e.g. from ScrapeData.stream_inns_data) as one CSV
+        file to S3 using a multipart upload. Parts are sent in the background while the next
+        batches are being produced. At most `workers` parts are in flight: when S3 is slower than
+        the batches, the stream waits for the oldest part, so at most about (workers + 1) * part_size
+        bytes are held in memory.
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+            stat_type (str): Type of stats ('batting', 'bowling', 'fielding', 'allround', 'personal_info').
+            batches (iterable): DataFrames with the same columns. The header is written once.
+            part_size (int): Bytes per uploaded part, at least 5 MB.
+            workers (int): Number of parts uploaded at the same time.
 
+        Returns:
+            int: Number of rows uploaded, or None if nothing was uploaded.
+        """
 
         if stat_type not in self.file_name_map:
             print(f" Invalid stat_type '{stat_type}'.")
             return None
 
         object_key = self.get_object_key(stat_type)
+        part_size = max(part_size, MIN_PART_SIZE)
+
+        upload_id = None
+        try:
+            upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=object_key, ContentType="text/csv")["UploadId"]
+
+            def upload_part(part_number, body):
+                response = s3.upload_part(Bucket=bucket_name, Key=object_key, UploadId=upload_id,
+                                          PartNumber=part_number, Body=body)
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+            parts, pending, buffer, buffered, rows = [], deque(), StringIO(), 0, 0
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+
+                def submit(body):
+                    # Wait for the oldest part before sending another one, so parts don't pile up in memory
+                    while len(pending) >= workers:
+                        parts.append(pending.popleft().result())
+                    pending.append(executor.submit(upload_part, len(parts) + len(pending) + 1, body))
+
+                for df in batches:
+                    if df is None or df.empty:
+                        continue
+
+                    # Step 1: Append the batch to the current part, with the header only before the first row
+                    chunk = df.to_csv(index=False, header=rows == 0)
+                    buffer.write(chunk)
+                    buffered += len(chunk.encode("utf-8"))
+                    rows += df.shape[0]
+
+                    # Step 2: Hand a full part over to the upload threads and start a new one
+                    if buffered >= part_size:
+                        submit(buffer.getvalue().encode("utf-8"))
+                        buffer, buffered = StringIO(), 0
+
+                # Step 3: The remainder is the last part, which may be smaller than 5 MB
+                if buffered:
+                    submit(buffer.getvalue().encode("utf-8"))
+
+                parts += [future.result() for future in pending]
+
+            if rows == 0:
+                s3.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+                print(f"Warning: {stat_type} stream is empty, skipping upload.")
+                return None
+
+            s3.complete_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id,
+                                         MultipartUpload={"Parts": parts})
+
+            print(f" Uploaded {rows} rows in {len(parts)} parts to s3://{bucket_name}/{object_key}")
+            return rows
+
+        except Exception as e:
+            # Don't leave the uploaded parts of a failed stream behind in the bucket
+            if upload_id is not None:
+                try:
+                    s3.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+                except Exception as abort_error:
+                    print(f"Error aborting the upload of {bucket_name}/{object_key}: {abort_error}")
+
+            print(f"Error streaming {stat_type} stats to {bucket_name}/{object_key}: {e}")
+            return None
+
+    def download_df(self, bucket_name, stat_type, dtype=None, object_key=None):
+
+        """Downloads a cricket stat CSV from S3 into a DataFrame (optionally with fixed column dtypes)."""
+
+
+        if stat_type not in self.file_name_map:
+            print(f" Invalid stat_type '{stat_type}'.")
+            return None
+
+        # A download of the whole table starts over, files downloaded by key (e.g. partitions) add to it
+        if object_key is None:
+            self.failed.discard(stat_type)
+
+        object_key = object_key or self.get_object_key(stat_type)
         
         try:
 
             response = s3.get_object(Bucket=bucket_name, Key=object_key)
-            content = response["Body"].read().decode("utf-8")
-            df = pd.read_csv(StringIO(content))
+            body = response["Body"].read()
+            content = body.decode("utf-8")
+
+            # Tables with a schema are typed in the same read_csv pass, including the shared categories that CSV doesn't keep
+            if stat_type in self.schemas:
+                if self.dtype_backend == "pyarrow":
+                    df = self.schemas[stat_type].read_csv(BytesIO(body), dtype_backend="pyarrow")
+                else:
+                    df = self.schemas[stat_type].read_csv(StringIO(content))
+            else:
+                df = pd.read_csv(StringIO(content), dtype=dtype)
+
             print(f" Downloaded from s3://{bucket_name}/{object_key}")
             return df
         
         except Exception as e:
+            # A missing file is a table that doesn't exist yet, any other error leaves the table unknown
+            missing = isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") in ["NoSuchKey", "404"]
+            if not missing:
+                self.failed.add(stat_type)
+
             print(f"Error downloading {stat_type} stats from {bucket_name}/{object_key}: {e}")
             return None
 
+    def list_csv(self, bucket_name, prefix):
+
+        """
+        Lists the CSV files under a prefix of the bucket, e.g. master/batting/.
+
+        Returns:
+            list: The file names without the prefix and the '.csv' extension, or None if the listing failed.
+        """
+
+        try:
+            names = []
+            for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    if obj["Key"].endswith(".csv"):
+                        names.append(obj["Key"][len(prefix):-len(".csv")])
+            return names
+
+        except Exception as e:
+            print(f"Error listing {bucket_name}/{prefix}: {e}")
+            return None
+
+    def upload_row_hashes(self, bucket_name, row_hashes):
+
+        """
+        Uploads the raw row hashes of a transform (TransformData.row_hashes) next to the tf files,
+        e.g. players_data/virat_kohli/tf/batting_row_hashes.csv.
+
+        Parameters:
+            bucket_name (str): Name of the S3 bucket.
+            row_hashes (dict): stat type -> pd.Series of row hashes, aligned with the tf rows.
+        """
+
+        for stat_type, hashes in row_hashes.items():
+            if hashes is not None:
+                self.upload_df(bucket_name, f"{stat_type}_hashes", pd.DataFrame({"Row Hash": hashes}))
+
+    def download_row_hashes(self, bucket_name, stat_type="all"):
+
+        """
+        Downloads the raw row hashes stored by upload_row_hashes().
+
+        Returns:
+            dict: stat type -> pd.Series of row hashes, for the stat types that have them.
+        """
+
+        row_hashes = {}
+        for name in ["batting", "bowling", "fielding", "allround"]:
+            if stat_type in ["all", name]:
+                df = self.download_df(bucket_name, f"{name}_hashes", dtype=str)
+                if df is not None:
+                    row_hashes[name] = df["Row Hash"]
+
+        return row_hashes
+
     def load_data(self, bucket_name, load_type, stat_type="all"):
     
         """
@@ -1,3 +1,11 @@
 from .scraper import ScrapeData
+from .pool import DriverPool
+from .fetcher import HttpFetcher
+from .fixtures import FixtureServer
+from .id_cache import PlayerIdCache
+from .watermark import get_watermark, append_delta
+from .snapshots import SnapshotStore
+from .metrics import ScrapeMetrics
+from .batch import scrape_players, replay_players
 
-__all__ = ["ScrapeData"]
+__all__ = ["ScrapeData", "DriverPool", "HttpFetcher", "FixtureServer", "PlayerIdCache", "get_watermark", "append_delta", "SnapshotStore", "ScrapeMetrics", "scrape_players", "replay_players"]
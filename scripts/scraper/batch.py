@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .pool import DriverPool
+from .fetcher import HttpFetcher
+from .scraper import ScrapeData
+
+
+def scrape_player(player_name, pool, stats_type="all", backend="selenium", fetcher=None, id_cache=None, metrics=None):
+
+    """Scrapes one player on a driver borrowed from `pool` (only if a browser is needed) and returns the driver afterwards."""
+
+    with ScrapeData(player_name, pool=pool, backend=backend, fetcher=fetcher, id_cache=id_cache, metrics=metrics) as scraper:
+        scraper.get_player_stats(stats_type)
+
+    return scraper
+
+
+def scrape_players(player_names, stats_type="all", workers=4, pool=None, backend="selenium", id_cache=None, metrics=None):
+
+    """
+    Scrapes a list of players concurrently across a pool of warm WebDrivers.
+
+    Parameters:
+        player_names (list): Names of the players to scrape.
+        stats_type (str): The type of statistics passed to get_player_stats() for every player.
+        workers (int): Degree of parallelism, i.e. how many players are scraped at the same time.
+        pool (DriverPool): An existing pool to borrow drivers from. If None and the backend is
+                           'selenium', a pool of `workers` drivers is started and closed for this batch.
+        backend (str): 'selenium' or 'http'. With 'http' the stats engine pages of all players
+                       share one keep-alive session and no pool is started: a scraper only starts
+                       a browser if it needs one (search or profile page), unless a pool is passed.
+        id_cache (PlayerIdCache): Shared name -> ID cache, so known players skip the search page.
+        metrics (ScrapeMetrics): Shared collector for the per-stage timings and row counts of the batch.
+
+    Returns:
+        dict: player name -> ScrapeData with the scraped stats, or None if scraping failed.
+    """
+
+    start_time = time.time()
+    # Only the selenium backend needs a browser per worker up front
+    own_pool = pool is None and backend == "selenium"
+    pool = DriverPool(size=workers) if own_pool else pool
+    fetcher = HttpFetcher(pool_size=workers) if backend == "http" else None
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(scrape_player, name, pool, stats_type, backend, fetcher, id_cache, metrics): name for name in player_names}
+
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Error in scraping {name}: ", e)
+                    results[name] = None
+    finally:
+        if own_pool:
+            pool.close()
+        if fetcher is not None:
+            fetcher.close()
+
+    end_time = time.time()
+    print(f"Scraped {len(player_names)} players with {workers} workers in {end_time - start_time:.2f} seconds")
+
+    return {name: results.get(name) for name in player_names}
+
+
+def replay_players(players, snapshots, stats_type="all"):
+
+    """
+    Rebuilds the stats of many players from archived page snapshots, without a browser.
+
+    Parameters:
+        players (dict): player name -> Player ID, or (Player ID, Player URL) when the profile URL
+                        differs from the one derived from the name.
+        snapshots (SnapshotStore): The archive the pages were stored in while scraping.
+        stats_type (str): The type of statistics passed to get_player_stats() for every player.
+
+    Returns:
+        dict: player name -> ScrapeData with the rebuilt stats, or None if the replay failed.
+    """
+
+    start_time = time.time()
+
+    results = {}
+    for name, player in players.items():
+        player_id, player_url = player if isinstance(player, tuple) else (player, None)
+        try:
+            scraper = ScrapeData(name, player_id=player_id, player_url=player_url, snapshots=snapshots, replay=True)
+            scraper.get_player_stats(stats_type)
+            results[name] = scraper
+        except Exception as e:
+            print(f"Error in replaying {name}: ", e)
+            results[name] = None
+
+    end_time = time.time()
+    print(f"Replayed {len(players)} players in {end_time - start_time:.2f} seconds")
+
+    return results
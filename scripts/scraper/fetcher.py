@@ -0,0 +1,96 @@
+import os
+import re
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+def fixture_name(url):
+
+    """Maps a URL (path and query) to the file name a recorded page is stored under."""
+
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    return re.sub(r"[^A-Za-z0-9]+", "_", target).strip("_") + ".html"
+
+
+class HttpFetcher:
+
+    def __init__(self, pool_size=10, timeout=30, retries=3, record_dir=None):
+
+        """
+        Initialize a keep-alive HTTP session for pages that are plain HTML and
+        don't need a browser (the stats engine innings tables).
+
+        Parameters:
+            pool_size (int): Maximum number of kept-alive connections per host.
+            timeout (int): Seconds to wait for a response.
+            retries (int): Retries on connection errors and 429/5xx responses.
+            record_dir (str): If given, every fetched page is also saved here under
+                              fixture_name(url), to be served back by FixtureServer.
+        """
+
+        self.timeout = timeout
+        self.record_dir = record_dir
+
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url):
+
+        """Fetches `url` over the pooled session and returns the page HTML."""
+
+        start_time = time.time()
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        html = response.text
+
+        if self.record_dir is not None:
+            os.makedirs(self.record_dir, exist_ok=True)
+            with open(os.path.join(self.record_dir, fixture_name(url)), "w", encoding="utf-8") as f:
+                f.write(html)
+
+        end_time = time.time()
+        print(f"Fetched {url} in {end_time - start_time:.2f} seconds")
+
+        return html
+
+    def stream(self, url, chunk_size=65536):
+
+        """
+        Fetches `url` over the pooled session and yields the page in pieces as they arrive,
+        so parsing can start before the download has finished.
+
+        Parameters:
+            url (str): The page to fetch.
+            chunk_size (int): Bytes per yielded piece.
+        """
+
+        start_time = time.time()
+        chunks = []
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if self.record_dir is not None:
+                    chunks.append(chunk)
+                yield chunk
+
+        if self.record_dir is not None:
+            os.makedirs(self.record_dir, exist_ok=True)
+            with open(os.path.join(self.record_dir, fixture_name(url)), "wb") as f:
+                f.write(b"".join(chunks))
+
+        end_time = time.time()
+        print(f"Streamed {url} in {end_time - start_time:.2f} seconds")
+
+    def close(self):
+        self.session.close()
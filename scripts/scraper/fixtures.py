@@ -0,0 +1,62 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from .fetcher import fixture_name
+
+
+class FixtureServer:
+
+    def __init__(self, directory, host="127.0.0.1", port=0):
+
+        """
+        Serves pages recorded by HttpFetcher(record_dir=...) on a local port, so the
+        HTTP backend of ScrapeData can be run offline:
+
+            with FixtureServer("fixtures/") as server:
+                scraper = ScrapeData("Virat Kohli", backend="http", stats_url=server.url)
+
+        Parameters:
+            directory (str): The folder holding the recorded pages.
+            host (str): Interface to bind to.
+            port (int): Port to bind to, 0 picks a free one.
+        """
+
+        self.directory = directory
+
+        class Handler(SimpleHTTPRequestHandler):
+
+            def do_GET(handler):
+                path = os.path.join(directory, fixture_name(handler.path))
+                if not os.path.isfile(path):
+                    handler.send_error(404, f"No recorded page for {handler.path}")
+                    return
+
+                with open(path, "rb") as f:
+                    body = f.read()
+
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/html; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
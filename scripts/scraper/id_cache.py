@@ -0,0 +1,95 @@
+import os
+import json
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cricketer_stats", "player_ids.json")
+
+
+def profile_url(player_name, player_id):
+
+    """Builds the ESPNcricinfo profile URL of a player from the name and ID."""
+
+    slug = "-".join(player_name.lower().split())
+    return f"https://www.espncricinfo.com/cricketers/{slug}-{player_id}"
+
+
+class PlayerIdCache:
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+
+        """
+        Initialize a persistent name -> (Player ID, Player URL) cache stored as a JSON file,
+        so that ScrapeData can skip the search page for players it has already resolved.
+
+        Parameters:
+            path (str): Location of the JSON cache file. It is created on the first save().
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(player_name):
+        return " ".join(str(player_name).lower().split())
+
+    def get(self, player_name):
+
+        """Returns (player_id, player_url) for a cached name, otherwise None."""
+
+        entry = self.entries.get(self.key(player_name))
+        return (entry["player_id"], entry["player_url"]) if entry else None
+
+    def put(self, player_name, player_id, player_url, save=True):
+
+        """Caches the ID and URL of a player, writing the file unless save=False."""
+
+        with self.lock:
+            self.entries[self.key(player_name)] = {"player_id": str(player_id), "player_url": player_url}
+
+        if save:
+            self.save()
+
+    def seed(self, info_df):
+
+        """
+        Seeds the cache from a personal info table, e.g. the master `personal_info.csv`
+        downloaded with LoadData(master=True). Every player is cached under the full name
+        and under the name in the profile URL (e.g. 'virat-kohli-253802' -> 'virat kohli').
+
+        Parameters:
+            info_df (pd.DataFrame): Table with 'Player ID', 'Player URL' and 'FULL NAME' columns.
+
+        Returns:
+            int: The number of players added.
+        """
+
+        if info_df is None or info_df.empty:
+            return 0
+
+        added = 0
+        for _, row in info_df.iterrows():
+            player_id, player_url = str(row["Player ID"]), row["Player URL"]
+            names = [row.get("FULL NAME"), " ".join(str(player_url).rstrip("/").split("/")[-1].split("-")[:-1])]
+
+            for name in names:
+                if isinstance(name, str) and name.strip() and self.get(name) is None:
+                    self.put(name, player_id, player_url, save=False)
+                    added += 1
+
+        self.save()
+        print(f"Seeded player ID cache with {added} names.")
+
+        return added
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+def prometheus_labels(**labels):
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+class ScrapeMetrics:
+
+    def __init__(self):
+
+        """
+        Initialize a collector of per-stage scraper timings and row counts. One instance can be
+        shared by all scrapers of a batch and exported once at the end, as JSON lines or as a
+        Prometheus text file (e.g. for the node_exporter textfile collector).
+
+        Each record holds: ts, player, record_type, stage, seconds and rows.
+        Stages: 'navigation', 'dom_wait', 'extraction', 'dataframe' and 'total' (per record type).
+        """
+
+        self.records = []
+        self.lock = threading.Lock()
+
+        # Number of records already written per JSON lines file, so appends don't repeat them
+        self.written = {}
+
+    def record(self, player, record_type, stage, seconds=None, rows=None):
+        with self.lock:
+            self.records.append({
+                "ts": time.time(),
+                "player": player,
+                "record_type": record_type,
+                "stage": stage,
+                "seconds": seconds,
+                "rows": rows
+            })
+
+    @contextmanager
+    def stage(self, player, record_type, stage):
+
+        """Times the enclosed block with a monotonic clock and records it under `stage`."""
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(player, record_type, stage, seconds=time.perf_counter() - start_time)
+
+    def rows(self, player, record_type, rows):
+        self.record(player, record_type, "rows", rows=rows)
+
+    def summary(self):
+
+        """Returns {(player, record_type): {stage: seconds, ..., 'rows': n}} with repeated stages summed."""
+
+        summary = {}
+        with self.lock:
+            for rec in self.records:
+                entry = summary.setdefault((rec["player"], rec["record_type"]), {})
+                if rec["stage"] == "rows":
+                    entry["rows"] = entry.get("rows", 0) + rec["rows"]
+                else:
+                    entry[rec["stage"]] = entry.get(rec["stage"], 0.0) + rec["seconds"]
+        return summary
+
+    def to_jsonl(self, path, append=True):
+
+        """
+        Writes the records as one JSON object per line.
+
+        Parameters:
+            path (str): The file to write to.
+            append (bool): Append only the records collected since the last call for this path,
+                           otherwise overwrite the file with every record.
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        key = os.path.abspath(path)
+        with self.lock, open(path, "a" if append else "w", encoding="utf-8") as f:
+            new_records = self.records[self.written.get(key, 0):] if append else self.records
+            for rec in new_records:
+                f.write(json.dumps(rec) + "\n")
+            self.written[key] = len(self.records)
+
+        print(f"Wrote {len(new_records)} scraper metrics to {path}")
+
+    def to_prometheus(self, path):
+
+        """Writes the summed stage durations and row counts in the Prometheus text exposition format."""
+
+        seconds_lines, rows_lines = [], []
+        for (player, record_type), entry in sorted(self.summary().items()):
+            for stage, value in entry.items():
+                if stage == "rows":
+                    rows_lines.append(f"scraper_rows{{{prometheus_labels(player=player, record_type=record_type)}}} {value}")
+                else:
+                    seconds_lines.append(f"scraper_stage_seconds{{{prometheus_labels(player=player, record_type=record_type, stage=stage)}}} {value:.6f}")
+
+        lines = ["# HELP scraper_stage_seconds Time spent per scraper stage, player and record type.",
+                 "# TYPE scraper_stage_seconds gauge"] + seconds_lines + \
+                ["# HELP scraper_rows Rows extracted per player and record type.",
+                 "# TYPE scraper_rows gauge"] + rows_lines
+
+        # Written to a temporary file first, so a collector never reads a half-written file
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+        print(f"Wrote scraper metrics to {path}")
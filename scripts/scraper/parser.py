@@ -0,0 +1,122 @@
+import lxml.html
+import lxml.etree
+
+# XPath equivalents of the Selenium locators used by ScrapeData, so that a page
+# fetched in one round trip can be parsed locally with identical results.
+HEADER_XPATH = "//thead/tr[contains(concat(' ', normalize-space(@class), ' '), ' headlinks ')]/th"
+ROWS_XPATH = "(//tbody)[4]//tr"
+INFO_HEADER_XPATH = "//div[@class='ds-grid lg:ds-grid-cols-3 ds-grid-cols-2 ds-gap-4 ds-mb-8']//p[@class='ds-text-tight-m ds-font-regular ds-uppercase ds-text-typo-mid3']"
+INFO_VALUE_XPATH = "//div[@class='ds-grid lg:ds-grid-cols-3 ds-grid-cols-2 ds-gap-4 ds-mb-8']//span[@class='ds-text-title-s ds-font-bold ds-text-typo']"
+
+
+def cell_text(element):
+
+    """
+    Returns the visible text of an element the way Selenium's `.text` does:
+    non-breaking spaces become spaces and runs of whitespace are collapsed.
+    """
+
+    return " ".join("".join(element.itertext()).replace("\xa0", " ").split())
+
+
+def parse_inns_table(html):
+
+    """
+    Parses a stats engine innings page into header names and row values.
+
+    Parameters:
+        html (str): The page source of a `view=innings` results page.
+
+    Returns:
+        tuple: (header_names, rows) where `header_names` ends with 'Match id' and
+               `rows` is a list of lists of non-empty cell texts.
+    """
+
+    tree = lxml.html.fromstring(html)
+
+    # Step 1: Extract the headers of the table
+    headers = [cell_text(th) for th in tree.xpath(HEADER_XPATH)]
+    header_names = [header for header in headers if header != ''] + ['Match id']
+
+    # Step 2: Extract the data from the 4th tbody, column-wise
+    rows = []
+    for row in tree.xpath(ROWS_XPATH):
+        cells = [cell_text(td) for td in row.iter("td")]
+        rows.append([cell for cell in cells if cell != ''])
+
+    return header_names, rows
+
+
+def parse_player_info(html):
+
+    """
+    Parses a player profile page into personal info headers and values.
+
+    Parameters:
+        html (str): The page source of the player's profile page.
+
+    Returns:
+        tuple: (header_names, values). Headers are upper-cased, as the `ds-uppercase`
+               class renders them in the browser (e.g. 'PLAYING ROLE').
+    """
+
+    tree = lxml.html.fromstring(html)
+
+    header_names = [cell_text(p).upper() for p in tree.xpath(INFO_HEADER_XPATH)]
+    values = [cell_text(span) for span in tree.xpath(INFO_VALUE_XPATH)]
+
+    return header_names, values
+
+
+def stream_inns_table(chunks, batch_size=100):
+
+    """
+    Incrementally parses a stats engine innings page while it is still being downloaded,
+    with the same header and row rules as parse_inns_table().
+
+    Parameters:
+        chunks (iterable): Pieces of the page source (str or bytes), e.g. from HttpFetcher.stream().
+        batch_size (int): Number of rows per yielded batch.
+
+    Yields:
+        tuple: (header_names, rows) with at most `batch_size` rows each.
+    """
+
+    parser = lxml.etree.HTMLPullParser(events=("start", "end"))
+    header_names, batch = None, []
+    tbody_count, in_rows = 0, False
+
+    def is_headlinks(tr):
+        return tr.getparent() is not None and tr.getparent().tag == "thead" and "headlinks" in (tr.get("class") or "").split()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            if element.tag == "tbody":
+                if event == "start":
+                    tbody_count += 1
+                    in_rows = in_rows or tbody_count == 4
+                elif tbody_count >= 4 and in_rows and not any(parent.tag == "tbody" for parent in element.iterancestors()):
+                    in_rows = False
+
+            elif event == "end" and element.tag == "tr":
+                # Step 1: The header row of the table
+                if header_names is None and is_headlinks(element):
+                    headers = [cell_text(th) for th in element.iter("th")]
+                    header_names = [header for header in headers if header != ''] + ['Match id']
+
+                # Step 2: Rows of the 4th tbody, released once read to keep memory flat
+                elif in_rows:
+                    cells = [cell_text(td) for td in element.iter("td")]
+                    batch.append([cell for cell in cells if cell != ''])
+                    if not any(parent.tag == "tr" for parent in element.iterancestors()):
+                        element.clear()
+
+                    if len(batch) >= batch_size:
+                        yield header_names, batch
+                        batch = []
+
+    parser.close()
+    if batch:
+        yield header_names, batch
@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+import undetected_chromedriver as uc
+
+# Put in the idle queue once every driver is lost, so waiting acquire() calls fail instead of blocking forever
+NO_DRIVERS = object()
+
+
+def new_driver(headless=True):
+
+    """Starts a Chrome WebDriver with the options used by ScrapeData, headless unless told otherwise."""
+
+    options = uc.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+
+    return uc.Chrome(options=options)
+
+
+class DriverPool:
+
+    def __init__(self, size=4, headless=True):
+
+        """
+        Initialize a pool of warm WebDrivers that ScrapeData instances borrow and return,
+        so that a batch of players pays the browser cold start only `size` times.
+
+        Parameters:
+            size (int): The number of browsers to start.
+            headless (bool): Start the browsers without a window.
+        """
+
+        self.size = size
+        self.headless = headless
+        self.drivers = []
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+
+        start_time = time.time()
+        print(f"Setting up a pool of {size} WebDrivers...")
+
+        # Drivers are started one after another, undetected_chromedriver patches its binary on start-up
+        for _ in range(size):
+            driver = new_driver(self.headless)
+            self.drivers.append(driver)
+            self.idle.put(driver)
+
+        end_time = time.time()
+        print(f"WebDriver pool ready in {end_time - start_time:.2f} seconds")
+
+    def acquire(self, timeout=None):
+
+        """
+        Borrows an idle WebDriver, waiting up to `timeout` seconds for one to be returned.
+        Raises RuntimeError if the pool has no drivers left (see release()).
+        """
+
+        driver = self.idle.get(timeout=timeout)
+        if driver is NO_DRIVERS:
+            # Left in the queue for the other waiters
+            self.idle.put(NO_DRIVERS)
+            raise RuntimeError("The WebDriver pool has no drivers left, every replacement failed to start.")
+        return driver
+
+    def release(self, driver, discard=False):
+
+        """
+        Returns a borrowed WebDriver to the pool.
+
+        Parameters:
+            driver: The WebDriver obtained from acquire().
+            discard (bool): Quit the driver and put a fresh one in its place (e.g. after a crash).
+                            If the fresh one fails to start, the pool shrinks by one driver.
+        """
+
+        if discard:
+            with self.lock:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    print("Error while closing the WebDriver:", e)
+                if driver in self.drivers:
+                    self.drivers.remove(driver)
+
+                try:
+                    driver = new_driver(self.headless)
+                except Exception as e:
+                    self.size -= 1
+                    print(f"Error starting a replacement WebDriver, the pool shrinks to {self.size}:", e)
+                    if self.size == 0:
+                        self.idle.put(NO_DRIVERS)
+                    return
+
+                self.drivers.append(driver)
+
+        self.idle.put(driver)
+
+    def close(self):
+
+        """Quits every WebDriver in the pool."""
+
+        with self.lock:
+            for driver in self.drivers:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    print("Error while closing the WebDriver:", e)
+            self.drivers = []
+            self.idle = queue.Queue()
+
+        print("WebDriver pool closed successfully.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,14 +1,43 @@
 import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-import undetected_chromedriver as uc
+from selenium.webdriver.support.ui import WebDriverWait
+from .parser import parse_inns_table, parse_player_info, stream_inns_table
+from .pool import new_driver
+from .fetcher import HttpFetcher
+from .id_cache import profile_url
+from .watermark import get_watermark
+from .metrics import ScrapeMetrics
+
+STATS_URL = "https://stats.espncricinfo.com"
 
 class ScrapeData:
 
-    def __init__(self, player_name):
+    def __init__(self, player_name, extract_mode="source", pool=None, backend="selenium", fetcher=None, stats_url=STATS_URL,
+                 player_id=None, player_url=None, id_cache=None, since=None, known_matches=None,
+                 snapshots=None, replay=False, headless=True, metrics=None):
         self.player_name = player_name
-        self.player_id = None
-        self.player_url = None
+        self.player_id = str(player_id) if player_id is not None else None
+        self.player_url = player_url or (profile_url(player_name, player_id) if player_id is not None else None)
+
+        # Optional PlayerIdCache used by get_player_url() instead of the search page
+        self.id_cache = id_cache
+
+        # 'source' parses the whole page locally in one round trip, 'elements' reads cell by cell
+        self.extract_mode = extract_mode
+
+        # 'http' fetches the stats engine pages without a browser, Selenium is kept for search and profile pages
+        self.backend = backend
+        if fetcher is None and backend == "http":
+            fetcher = HttpFetcher()
+        self.fetcher = fetcher
+        self.stats_url = stats_url.rstrip("/")
+
+        # Incremental watermark: only innings from `since` on, minus the already known ones, are returned.
+        # known_matches holds match ids ('ODI # 2742') and/or (match id, inns) pairs
+        self.since = pd.Timestamp(since) if since is not None else None
+        self.known_matches = set(known_matches or [])
     
         # Initialize class variables for storing stats
         self.battingstats = None
@@ -17,21 +46,93 @@ class ScrapeData:
         self.fieldingstats = None
         self.player_info = None
 
-        # Set up the WebDriver and open the search URL
-        options = uc.ChromeOptions()
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
+        # Per record type timings (in seconds) of the last get_player_stats() run
+        self.timings = {}
+
+        # Per stage timings and row counts, pass a shared ScrapeMetrics to collect a whole batch
+        self.metrics = metrics if metrics is not None else ScrapeMetrics()
+
+        # Optional SnapshotStore: fetched pages are archived to it, or with replay=True read back from it
+        self.snapshots = snapshots
+        self.replay = replay
+        if self.replay and self.snapshots is None:
+            raise ValueError("replay=True needs a SnapshotStore to read pages from.")
+
+        # The WebDriver is only set up (or borrowed from a DriverPool) on first use, see the `driver` property
+        self.pool = pool
+        self.headless = headless
+        self._driver = None
+
+        # Set when a scrape raised: the driver may have crashed or hung, so close() discards it
+        self.error = False
+
+        # Known players are resolved from the cache right away; anything else is resolved by get_player_stats()
+        if self.player_id is None and self.id_cache is not None:
+            cached = self.id_cache.get(self.player_name)
+            if cached is not None:
+                self.player_id, self.player_url = cached
 
-        print("Setting up WebDriver...")
-        self.driver = uc.Chrome(options=options)        
+    @property
+    def driver(self):
+        # Start (or borrow) the WebDriver the first time a page actually needs a browser
+        if self._driver is None:
+            if self.replay:
+                raise RuntimeError("Replays are rebuilt from snapshots and never start a browser.")
+            if self.pool is not None:
+                print("Borrowing WebDriver from pool...")
+                self._driver = self.pool.acquire()
+            else:
+                print("Setting up WebDriver...")
+                self._driver = new_driver(headless=self.headless)
+        return self._driver
 
-        # Call get_player_url() to fetch the player's URL and ID when the object is initialized
-        self.get_player_url()
+    def stage(self, record_type, stage):
+        # Context manager timing one stage of this player's record type in self.metrics
+        return self.metrics.stage(self.player_name, record_type, stage)
+
+    def wait_ready(self, timeout=60):
+        WebDriverWait(self.driver, timeout).until(lambda d: d.execute_script("return document.readyState") == "complete")
+
+    def fetch_page(self, url, browser=True, record_type="page"):
+        # Returns the HTML of `url` from the snapshots (replay), the HTTP session (stats engine
+        # pages with the http backend, browser=False) or the WebDriver, archiving fetched pages
+        if self.replay:
+            with self.stage(record_type, "navigation"):
+                html = self.snapshots.get(url)
+            if html is None:
+                raise ValueError(f"No snapshot found for {url}")
+            return html
+
+        if not browser and self.backend == "http":
+            with self.stage(record_type, "navigation"):
+                html = self.fetcher.get(url)
+        else:
+            with self.stage(record_type, "navigation"):
+                self.driver.get(url)
+            with self.stage(record_type, "dom_wait"):
+                self.wait_ready()
+            with self.stage(record_type, "extraction"):
+                html = self.driver.page_source
+
+        if self.snapshots is not None:
+            self.snapshots.put(url, html)
+
+        return html
 
     def get_player_url(self):
         start_time = time.time()
+
+        # Names resolved before are read from the cache without opening the search page
+        cached = self.id_cache.get(self.player_name) if self.id_cache is not None else None
+        if cached is not None:
+            self.player_id, self.player_url = cached
+            print(f"Found {self.player_name}'s player URL and Player ID in cache.")
+            return
+
+        if self.replay:
+            print(f"Player ID of {self.player_name} is not known, pass player_id or an id_cache to replay.")
+            return
+
         print(f"Extracting {self.player_name}'s player URL and Player ID....")
         search_url = f"https://search.espncricinfo.com/ci/content/site/search.html?search={self.player_name.lower().replace(' ', '%20')};type=player"
         self.driver.get(search_url)
@@ -40,63 +141,171 @@ class ScrapeData:
             player_link_element = self.driver.find_element(By.CSS_SELECTOR, "h3.name.link-cta a")
             self.player_url = player_link_element.get_attribute("href")
             self.player_id = self.player_url.split('-')[-1]
+            if self.id_cache is not None:
+                self.id_cache.put(self.player_name, self.player_id, self.player_url)
             print(f"Extraction Successful for {self.player_name}.")
             end_time = time.time()
             print(f"Time taken to extract URL: {end_time - start_time:.2f} seconds")
         except Exception as e:
             print(f"Error in extracting {self.player_name}'s url:", e)
+            self.error = True
             return None, None
 
-    def extract_inns_data(self, record_type):
+    def set_watermark(self, df):
+        # Take the watermark from the player's existing raw or tf data
+        self.since, self.known_matches = get_watermark(df)
+        print(f"Watermark for {self.player_name}: {len(self.known_matches)} known matches, last on {self.since}")
+
+    def inns_url(self, record_type):
+        # Construct the search URL based on record_type (batting, bowling, etc.)
+        search_url = f"{self.stats_url}/ci/engine/player/{self.player_id}.html?class=11;template=results;type={record_type};view=innings"
+
+        # Restrict the results to the date span starting at the watermark
+        if self.since is not None and not pd.isna(self.since):
+            search_url += f";spanmin1={self.since.day}+{self.since.strftime('%b')}+{self.since.year};spanval1=span"
+
+        return search_url
+
+    def inns_frame(self, header_names, rows):
+        # Rows that don't fit the header (e.g. 'No records available to match this query') are skipped
+        innings_data = pd.DataFrame([row for row in rows if len(row) == len(header_names)], columns=header_names)
+
+        # Drop innings that are already known, so that only the delta is returned
+        if self.known_matches:
+            keys = zip(innings_data['Match id'], innings_data['Inns'])
+            known = [(match_id, inns) in self.known_matches or match_id in self.known_matches for match_id, inns in keys]
+            innings_data = innings_data[~pd.Series(known, index=innings_data.index, dtype=bool)].reset_index(drop=True)
+
+        return innings_data
+
+    def info_frame(self, header_names, values):
+        return pd.DataFrame([[self.player_id, self.player_url] + values], columns=['Player ID','Player URL'] + header_names)
+
+    def extract_inns_data(self, record_type, mode=None):
+        mode = mode or self.extract_mode
         start_time = time.time()
         print(f"Starting extraction of {self.player_name}'s {record_type} stats....")
         
-        # Construct the search URL based on record_type (batting, bowling, etc.)
-        search_url = f"https://stats.espncricinfo.com/ci/engine/player/{self.player_id}.html?class=11;template=results;type={record_type};view=innings"
+        search_url = self.inns_url(record_type)
         
-        # Open the URL
-        self.driver.get(search_url)
+        if mode == "elements" and self.backend != "http" and not self.replay:
+            # Open the URL
+            with self.stage(record_type, "navigation"):
+                self.driver.get(search_url)
+            with self.stage(record_type, "dom_wait"):
+                self.wait_ready()
 
-        # Step 1: Extract the headers of the table
-        headers = self.driver.find_elements(By.CSS_SELECTOR, "thead tr.headlinks th")
-        header_names = [header.text for header in headers if header.text != ''] + ['Match id']  # Add match_id column name
-        
-        # Step 2: Extract the data from the 4th tbody
-        rows = self.driver.find_elements(By.XPATH, "(//tbody)[4]//tr")
-        
-        # Step 3: Extract the data column-wise and store it in a list
-        player_data = []
-        for row in rows:
-            cells = row.find_elements(By.TAG_NAME, "td")
-            row_data = [cell.text for cell in cells if cell.text != '']
-            player_data.append(row_data)
+            with self.stage(record_type, "extraction"):
+                # Step 1: Extract the headers of the table
+                headers = self.driver.find_elements(By.CSS_SELECTOR, "thead tr.headlinks th")
+                header_names = [header.text for header in headers if header.text != ''] + ['Match id']  # Add match_id column name
+                
+                # Step 2: Extract the data from the 4th tbody
+                rows = self.driver.find_elements(By.XPATH, "(//tbody)[4]//tr")
+                
+                # Step 3: Extract the data column-wise and store it in a list
+                player_data = []
+                for row in rows:
+                    cells = row.find_elements(By.TAG_NAME, "td")
+                    row_data = [cell.text for cell in cells if cell.text != '']
+                    player_data.append(row_data)
+
+            if self.snapshots is not None:
+                self.snapshots.put(search_url, self.driver.page_source)
+
+        else:
+            # Steps 1-3: Fetch the whole page in a single call (browser, HTTP session or snapshot) and parse it locally
+            html = self.fetch_page(search_url, browser=False, record_type=record_type)
+            with self.stage(record_type, "extraction"):
+                header_names, player_data = parse_inns_table(html)
+            mode = "replay" if self.replay else "http" if self.backend == "http" else "source"
         
         # Step 4: Create a DataFrame from the extracted data
-        innings_data = pd.DataFrame(player_data, columns=header_names)
+        with self.stage(record_type, "dataframe"):
+            innings_data = self.inns_frame(header_names, player_data)
+        self.metrics.rows(self.player_name, record_type, innings_data.shape[0])
         
         end_time = time.time()
-        print(f"Extracted {innings_data.shape[0]} records in {end_time - start_time:.2f} seconds")
+        print(f"Extracted {innings_data.shape[0]} records in {end_time - start_time:.2f} seconds ({mode} mode)")
         
         return innings_data
 
-    def extract_player_info(self):
+    def stream_inns_data(self, record_type, batch_size=100):
+        # Yields the innings of `record_type` as DataFrames of up to `batch_size` rows while the page
+        # is parsed. With the http backend the page is parsed as it downloads, otherwise the fetched
+        # source is parsed incrementally, so the consumer (e.g. LoadData.upload_stream) can start early.
+        start_time = time.time()
+        print(f"Starting streamed extraction of {self.player_name}'s {record_type} stats....")
+
+        search_url = self.inns_url(record_type)
+
+        if self.backend == "http" and not self.replay:
+            pieces = []
+
+            def chunks():
+                for chunk in self.fetcher.stream(search_url):
+                    pieces.append(chunk)
+                    yield chunk
+
+            source = chunks()
+        else:
+            pieces = None
+            source = [self.fetch_page(search_url, browser=False, record_type=record_type)]
+
+        total_rows = 0
+        for header_names, rows in stream_inns_table(source, batch_size):
+            with self.stage(record_type, "dataframe"):
+                batch = self.inns_frame(header_names, rows)
+            if batch.empty:
+                continue
+
+            total_rows += batch.shape[0]
+            yield batch
+
+        # The full page is only known once the download is complete
+        if pieces is not None and self.snapshots is not None:
+            self.snapshots.put(search_url, b"".join(pieces).decode("utf-8", errors="replace"))
+        self.metrics.rows(self.player_name, record_type, total_rows)
+
+        end_time = time.time()
+        self.metrics.record(self.player_name, record_type, "extraction", seconds=end_time - start_time)
+        print(f"Streamed {total_rows} records in {end_time - start_time:.2f} seconds")
+
+    def extract_player_info(self, mode=None):
+        mode = mode or self.extract_mode
         try:
             start_time = time.time()
             print(f"Starting extraction of {self.player_name}'s personal info....")
             
-            # Start by opening the player info URL
-            self.driver.get(self.player_url)
+            if mode == "source" or self.replay:
+                # Steps 1-2: Parse headers and values from the page source in a single call
+                html = self.fetch_page(self.player_url, record_type='personal_info')
+                with self.stage('personal_info', "extraction"):
+                    header_names, value_texts = parse_player_info(html)
+
+            else:
+                # Start by opening the player info URL
+                with self.stage('personal_info', "navigation"):
+                    self.driver.get(self.player_url)
+                with self.stage('personal_info', "dom_wait"):
+                    self.wait_ready()
 
-            # Step 1: Extract headers within the specified div tag
-            headers = self.driver.find_elements(By.XPATH, "//div[@class='ds-grid lg:ds-grid-cols-3 ds-grid-cols-2 ds-gap-4 ds-mb-8']//p[@class='ds-text-tight-m ds-font-regular ds-uppercase ds-text-typo-mid3']")
-            header_names = ['Player ID','Player URL']+[header.text for header in headers]
+                with self.stage('personal_info', "extraction"):
+                    # Step 1: Extract headers within the specified div tag
+                    headers = self.driver.find_elements(By.XPATH, "//div[@class='ds-grid lg:ds-grid-cols-3 ds-grid-cols-2 ds-gap-4 ds-mb-8']//p[@class='ds-text-tight-m ds-font-regular ds-uppercase ds-text-typo-mid3']")
+                    header_names = [header.text for header in headers]
 
-            # Step 2: Extract values within the specified div tag
-            values = self.driver.find_elements(By.XPATH, "//div[@class='ds-grid lg:ds-grid-cols-3 ds-grid-cols-2 ds-gap-4 ds-mb-8']//span[@class='ds-text-title-s ds-font-bold ds-text-typo']")
-            value_texts = [self.player_id,self.player_url]+[value.text for value in values]
+                    # Step 2: Extract values within the specified div tag
+                    values = self.driver.find_elements(By.XPATH, "//div[@class='ds-grid lg:ds-grid-cols-3 ds-grid-cols-2 ds-gap-4 ds-mb-8']//span[@class='ds-text-title-s ds-font-bold ds-text-typo']")
+                    value_texts = [value.text for value in values]
+
+                if self.snapshots is not None:
+                    self.snapshots.put(self.player_url, self.driver.page_source)
 
             # Step 3: Create a DataFrame from the extracted data
-            player_info = pd.DataFrame([value_texts], columns=header_names)
+            with self.stage('personal_info', "dataframe"):
+                player_info = self.info_frame(header_names, value_texts)
+            self.metrics.rows(self.player_name, 'personal_info', player_info.shape[0])
 
             end_time = time.time()
             print(f"Extracted player info in {end_time - start_time:.2f} seconds")
@@ -105,43 +314,175 @@ class ScrapeData:
             
         except Exception as e:
             print(f"Error in extracting {self.player_name}'s personal info:", e)
+            self.error = True
             return None
 
-    def get_player_stats(self, stats_type="all"):
+    def is_allrounder(self):
+        return self.player_info is not None and 'allround' in self.player_info['PLAYING ROLE'][0].lower()
+
+    def timed(self, name, func, *args):
+        # Run func(*args) and record how long it took under self.timings[name] and as the 'total' stage
+        start_time = time.perf_counter()
+        result = func(*args)
+        self.timings[name] = time.perf_counter() - start_time
+        self.metrics.record(self.player_name, name, "total", seconds=self.timings[name])
+        return result
+
+    def fetch_in_tabs(self, urls, timeout=60):
+        # Open every URL in its own tab so the pages load in parallel inside one browser,
+        # then collect the page sources one tab at a time
+        start_time = time.perf_counter()
+        main_window = self.driver.current_window_handle
+
+        tabs = {}
+        for name, url in urls.items():
+            with self.stage(name, "navigation"):
+                known = set(self.driver.window_handles)
+                self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+                tabs[name] = (set(self.driver.window_handles) - known).pop()
+
+        pages = {}
+        try:
+            for name, handle in tabs.items():
+                self.driver.switch_to.window(handle)
+                with self.stage(name, "dom_wait"):
+                    self.wait_ready(timeout)
+                with self.stage(name, "extraction"):
+                    pages[name] = self.driver.page_source
+                self.timings[name] = time.perf_counter() - start_time
+                self.metrics.record(self.player_name, name, "total", seconds=self.timings[name])
+        finally:
+            for handle in tabs.values():
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception as e:
+                    print("Error while closing a tab:", e)
+            self.driver.switch_to.window(main_window)
+
+        return pages
+
+    def get_player_stats_parallel(self, stats_type="all"):
+        # Record types are loaded concurrently. For 'all' the allround page is fetched speculatively
+        # alongside the others and only kept if the player turns out to be an allrounder.
+        record_types = [record_type for record_type in ['batting', 'bowling', 'allround', 'fielding'] if stats_type in ['all', record_type]]
+        need_info = stats_type in ['all', 'allround', 'personal_info']
+        urls = {record_type: self.inns_url(record_type) for record_type in record_types}
+
+        print(f"Starting parallel extraction of {self.player_name}'s {stats_type} stats....")
+
+        if self.backend == "http":
+            # Stats engine pages over the HTTP session in threads, profile page on the driver meanwhile
+            with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as executor:
+                futures = {record_type: executor.submit(self.timed, record_type, self.fetch_page, url, False, record_type) for record_type, url in urls.items()}
+                if need_info:
+                    self.player_info = self.timed('personal_info', self.extract_player_info)
+                pages = {record_type: future.result() for record_type, future in futures.items()}
+
+        else:
+            # Every page in its own browser tab
+            if need_info:
+                urls['personal_info'] = self.player_url
+            pages = self.fetch_in_tabs(urls)
+            if self.snapshots is not None:
+                for name, html in pages.items():
+                    self.snapshots.put(urls[name], html)
+            if need_info:
+                html = pages.pop('personal_info')
+                with self.stage('personal_info', "extraction"):
+                    header_names, values = parse_player_info(html)
+                with self.stage('personal_info', "dataframe"):
+                    self.player_info = self.info_frame(header_names, values)
+                self.metrics.rows(self.player_name, 'personal_info', self.player_info.shape[0])
+
+        frames = {}
+        for record_type, html in pages.items():
+            with self.stage(record_type, "extraction"):
+                header_names, rows = parse_inns_table(html)
+            with self.stage(record_type, "dataframe"):
+                frames[record_type] = self.inns_frame(header_names, rows)
+            self.metrics.rows(self.player_name, record_type, frames[record_type].shape[0])
+            print(f"Extracted {frames[record_type].shape[0]} {record_type} records in {self.timings[record_type]:.2f} seconds")
+
+        self.battingstats = frames.get('batting', self.battingstats)
+        self.bowlingstats = frames.get('bowling', self.bowlingstats)
+        self.fieldingstats = frames.get('fielding', self.fieldingstats)
+        if 'allround' in frames and self.is_allrounder():
+            self.allroundstats = frames['allround']
+
+    def get_player_stats(self, stats_type="all", parallel=False):
         try:
+            # Resolve the player ID and URL if they aren't known yet
+            if self.player_id is None:
+                self.get_player_url()
+
             # Ensure that player ID or player URL is available
             if not (self.player_id or self.player_url):
                 print("Player ID is not available. Run get_player_url() first.")
                 return
-            
-            # Fetch personal information if 'personal_info' is passed
-            if stats_type == "personal_info":
-                self.player_info = self.extract_player_info()
-            
-            # Fetch batting stats if 'all' or 'batting' is passed
-            if stats_type == "all" or stats_type == "batting":
-                self.battingstats = self.extract_inns_data('batting')
 
-            # Fetch bowling stats if 'all' or 'bowling' is passed
-            if stats_type == "all" or stats_type == "bowling":
-                self.bowlingstats = self.extract_inns_data('bowling')
+            start_time = time.perf_counter()
+            self.timings = {}
+
+            # Replays read local snapshots, there is nothing to gain from loading them in parallel
+            if parallel and not self.replay:
+                self.get_player_stats_parallel(stats_type)
 
-            # Check if the player is an all-rounder and fetch all-round stats
-            if stats_type == "all" or stats_type == "allround":
-                self.player_info = self.extract_player_info()
-                if self.player_info is not None and 'allround' in self.player_info['PLAYING ROLE'][0].lower():
-                    self.allroundstats = self.extract_inns_data('allround')
+            else:
+                # Fetch personal information if 'personal_info' is passed
+                if stats_type == "personal_info":
+                    self.player_info = self.timed('personal_info', self.extract_player_info)
+                
+                # Fetch batting stats if 'all' or 'batting' is passed
+                if stats_type == "all" or stats_type == "batting":
+                    self.battingstats = self.timed('batting', self.extract_inns_data, 'batting')
 
-            # Fetch fielding stats if 'all' or 'fielding' is passed
-            if stats_type == "all" or stats_type == "fielding":
-                self.fieldingstats = self.extract_inns_data('fielding')
+                # Fetch bowling stats if 'all' or 'bowling' is passed
+                if stats_type == "all" or stats_type == "bowling":
+                    self.bowlingstats = self.timed('bowling', self.extract_inns_data, 'bowling')
+
+                # Check if the player is an all-rounder and fetch all-round stats
+                if stats_type == "all" or stats_type == "allround":
+                    self.player_info = self.timed('personal_info', self.extract_player_info)
+                    if self.is_allrounder():
+                        self.allroundstats = self.timed('allround', self.extract_inns_data, 'allround')
+
+                # Fetch fielding stats if 'all' or 'fielding' is passed
+                if stats_type == "all" or stats_type == "fielding":
+                    self.fieldingstats = self.timed('fielding', self.extract_inns_data, 'fielding')
+
+            self.timings['total'] = time.perf_counter() - start_time
+            self.metrics.record(self.player_name, 'all', "total", seconds=self.timings['total'])
+            print(f"Timings for {self.player_name}: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()))
 
         except Exception as e:
             print(f"Error in extracting stats for {self.player_name}: ", e)
+            self.error = True
+
+    def close(self, discard=False):
+        # Return a borrowed driver to its pool, otherwise shut the browser down. After a scrape that raised
+        # (discard or self.error) a borrowed driver is discarded, the pool puts a fresh one in its place
+        driver, self._driver = getattr(self, "_driver", None), None
+        if driver is None:
+            return
 
-    def __del__(self):
         try:
-            self.driver.quit()
-            print("WebDriver closed successfully.")
+            if self.pool is not None:
+                discard = discard or getattr(self, "error", False)
+                self.pool.release(driver, discard=discard)
+                print("WebDriver discarded, the pool starts a new one." if discard else "WebDriver returned to pool.")
+            else:
+                driver.quit()
+                print("WebDriver closed successfully.")
         except Exception as e:
-            print("Error while closing the WebDriver:", e)
\ No newline at end of file
+            print("Error while closing the WebDriver:", e)
+        self.error = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(discard=exc_type is not None)
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,101 @@
+import os
+import gzip
+import hashlib
+from urllib.parse import urlsplit
+from botocore.exceptions import ClientError
+from loader import loader as s3_loader
+
+
+def page_key(url):
+
+    """Identifies a page by its path and query, so snapshots don't depend on the host they came from."""
+
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    return hashlib.sha1(target.encode("utf-8")).hexdigest()
+
+
+class SnapshotStore:
+
+    def __init__(self, root=None, bucket_name=None, prefix="snapshots/"):
+
+        """
+        Initialize an archive of fetched pages, stored gzip-compressed and content-addressed,
+        either in a local folder or under `prefix` in an S3 bucket.
+
+        Layout:
+            objects/<sha256[:2]>/<sha256>.html.gz   one object per distinct page content
+            index/<sha1 of path and query>.txt      sha256 of the latest snapshot of that page
+
+        Parameters:
+            root (str): Local folder to store the snapshots in.
+            bucket_name (str): S3 bucket to store the snapshots in (used when root is None).
+            prefix (str): Key prefix inside the bucket.
+        """
+
+        if root is None and bucket_name is None:
+            raise ValueError("SnapshotStore needs either a local root or a bucket_name.")
+
+        self.root = root
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    @property
+    def s3(self):
+        # The S3 client of the loader, so snapshots share its credentials and connection pool
+        return s3_loader.s3
+
+    def exists(self, key):
+        if self.root is not None:
+            return os.path.exists(os.path.join(self.root, key))
+        try:
+            self.s3.head_object(Bucket=self.bucket_name, Key=self.prefix + key)
+            return True
+        except ClientError:
+            return False
+
+    def write(self, key, body):
+        if self.root is not None:
+            path = os.path.join(self.root, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+        else:
+            self.s3.put_object(Bucket=self.bucket_name, Key=self.prefix + key, Body=body)
+
+    def read(self, key):
+        try:
+            if self.root is not None:
+                with open(os.path.join(self.root, key), "rb") as f:
+                    return f.read()
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self.prefix + key)
+            return response["Body"].read()
+        except (FileNotFoundError, ClientError):
+            return None
+
+    def put(self, url, html):
+
+        """Archives the page fetched from `url` and returns its content digest."""
+
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        object_key = f"objects/{digest[:2]}/{digest}.html.gz"
+
+        # Identical content is stored once, only the index entry of the URL is updated
+        if not self.exists(object_key):
+            self.write(object_key, gzip.compress(body, mtime=0))
+        self.write(f"index/{page_key(url)}.txt", digest.encode("utf-8"))
+
+        return digest
+
+    def get(self, url):
+
+        """Returns the latest archived HTML of `url`, or None if it was never snapshotted."""
+
+        digest = self.read(f"index/{page_key(url)}.txt")
+        if digest is None:
+            return None
+
+        digest = digest.decode("utf-8").strip()
+        body = self.read(f"objects/{digest[:2]}/{digest}.html.gz")
+        return gzip.decompress(body).decode("utf-8") if body is not None else None
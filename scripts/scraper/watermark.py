@@ -0,0 +1,50 @@
+import pandas as pd
+
+RAW_DATE_FORMAT = "%d %b %Y"
+
+
+def get_watermark(df):
+
+    """
+    Derives an incremental scraping watermark from a player's existing data.
+
+    Parameters:
+        df (pd.DataFrame): Existing raw stats (with 'Match id', e.g. 'ODI # 2742') or
+                           transformed stats (with 'Format' and 'Match ID', e.g. '#2742').
+
+    Returns:
+        tuple: (since, known_matches) — the last 'Start Date' as a pd.Timestamp and the set of
+               known innings as (match id, inns) pairs in the raw form, e.g. ('ODI # 2742', '1').
+               Innings rather than whole matches are kept, so the second innings of a Test that
+               was in progress at the last run is still picked up. (None, set()) if df is empty.
+    """
+
+    if df is None or df.empty:
+        return None, set()
+
+    if 'Match id' in df.columns:
+        dates = pd.to_datetime(df['Start Date'], format=RAW_DATE_FORMAT, errors='coerce')
+        match_ids = df['Match id'].astype(str)
+        inns = df['Inns'].astype(str)
+    else:
+        dates = pd.to_datetime(df['Start Date'], errors='coerce')
+        match_ids = df['Format'].astype(str) + ' # ' + df['Match ID'].astype(str).str.lstrip('#')
+        inns = df['Inns'].map(lambda value: '-' if pd.isna(value) else str(int(value)))
+
+    known_matches = set(zip(match_ids, inns))
+
+    return dates.max(), known_matches
+
+
+def append_delta(existing_df, delta_df):
+
+    """Appends newly scraped raw innings to the existing raw frame, newer rows winning on (Match id, Inns)."""
+
+    if existing_df is None or existing_df.empty:
+        return delta_df
+    if delta_df is None or delta_df.empty:
+        return existing_df
+
+    return pd.concat([existing_df, delta_df])\
+             .drop_duplicates(subset=['Match id', 'Inns'], keep='last')\
+             .reset_index(drop=True)
@@ -1,3 +1,6 @@
 from .transformer import TransformData
+from .categories import CATEGORY_COLS, apply_categories, align_categories
+from .venues import VenueGazetteer
+from .batch import transform_players
 
-__all__ = ["TransformData"]
+__all__ = ["TransformData", "CATEGORY_COLS", "apply_categories", "align_categories", "VenueGazetteer", "transform_players"]
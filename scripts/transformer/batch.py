@@ -0,0 +1,171 @@
+import os
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from .transformer import TransformData
+
+STAT_ATTRS = {
+    'batting': 'battingstats',
+    'bowling': 'bowlingstats',
+    'fielding': 'fieldingstats',
+    'allround': 'allroundstats'
+}
+
+
+def raw_frames(raw):
+
+    """Reads the raw frames of one player from a dict ('batting', ..., 'personal_info') or from an object with
+    battingstats/bowlingstats/fieldingstats/allroundstats/player_info attributes (e.g. LoadData, ScrapeData)."""
+
+    if isinstance(raw, dict):
+        return {key: raw.get(key) for key in list(STAT_ATTRS) + ['personal_info']}
+
+    frames = {stat_type: getattr(raw, attr, None) for stat_type, attr in STAT_ATTRS.items()}
+    frames['personal_info'] = getattr(raw, 'player_info', None)
+    return frames
+
+
+def stack_and_transform(batch, transformers, frames, stat_type):
+
+    """
+    Runs transform_data() once over the stacked raw frames of many players and splits the result per player.
+    Each player's part is then cast by that player's TransformData, so cast failures end up in the
+    cast_errors of the player they belong to.
+
+    Frames are only stacked with frames of the same columns and dtypes (e.g. a 'Runs' column read as
+    int64 is not mixed with one holding '45*' strings), so every player gets exactly the output of a
+    per-player final_df(). Players with an empty frame are transformed on their own.
+    """
+
+    groups, results = {}, {}
+    for name, df in frames.items():
+        if df.empty:
+            results[name] = transformers[name].final_df(df, stat_type)
+        else:
+            groups.setdefault(tuple(zip(df.columns, df.dtypes.astype(str))), []).append(name)
+
+    for names in groups.values():
+        stacked = pd.concat([frames[name] for name in names], keys=names, names=['Player', None])
+        stacked = batch.transform_data(stacked)
+
+        # Split on the player key, categories are rebuilt from each player's own values
+        for name, part in stacked.groupby(level='Player', sort=False):
+            results[name] = transformers[name].cast_types(part.reset_index(drop=True), stat_type)
+
+    return results
+
+
+def transform_stacked(players, type="all", dtype_backend="numpy_nullable"):
+
+    """
+    Transforms many players in one process, with one final_df() call per stat type over the stacked frames.
+
+    Parameters:
+        players (dict): player name -> raw frames (see raw_frames()).
+        type (str): The type of statistics ('all', 'batting', 'bowling', 'fielding', 'allround').
+        dtype_backend (str): 'numpy_nullable' or 'pyarrow', see TransformData.
+
+    Returns:
+        dict: player name -> TransformData with the transformed stats and the player's own cast_errors,
+              or None if the transform failed.
+    """
+
+    transformers = {}
+    for name, raw in players.items():
+        frames = raw_frames(raw)
+        transformer = TransformData(name, dtype_backend)
+        transformer.battingstats = frames['batting']
+        transformer.bowlingstats = frames['bowling']
+        transformer.fieldingstats = frames['fielding']
+        transformer.allroundstats = frames['allround']
+        transformer.player_info = frames['personal_info']
+        transformers[name] = transformer
+
+    failed = set()
+    batch = TransformData("batch", dtype_backend)
+    for stat_type, attr in STAT_ATTRS.items():
+        if type not in ['all', stat_type]:
+            continue
+
+        # Same rule as process_data(): allround stats are only kept for allrounders
+        frames = {name: getattr(transformer, attr) for name, transformer in transformers.items()
+                  if getattr(transformer, attr) is not None and (stat_type != 'allround' or transformer.is_allrounder())}
+        if not frames:
+            continue
+
+        print(f"Processing {stat_type} stats of {len(frames)} players...")
+        try:
+            results = stack_and_transform(batch, transformers, frames, stat_type)
+        except Exception as e:
+            # One bad table shouldn't fail the whole batch, fall back to transforming player by player
+            print(f"Error in processing stacked {stat_type} stats, falling back to one player at a time: ", e)
+            results = {}
+            for name, df in frames.items():
+                try:
+                    # Cast failures of a stacked attempt are dropped, the player's own run collects them again
+                    transformers[name].cast_errors = [error for error in transformers[name].cast_errors if error['stat_type'] != stat_type]
+                    results[name] = transformers[name].final_df(df, stat_type)
+                except Exception as e:
+                    print(f"Error in processing {stat_type} stats for {name}: ", e)
+                    failed.add(name)
+
+        for name, df in results.items():
+            setattr(transformers[name], attr, df)
+
+    for name, transformer in transformers.items():
+        if transformer.cast_errors:
+            print(f"{len(transformer.cast_errors)} data type casting failures for {name}, see cast_errors.")
+
+    return {name: None if name in failed else transformer for name, transformer in transformers.items()}
+
+
+def transform_players(players, type="all", mode="pool", workers=None, dtype_backend="numpy_nullable"):
+
+    """
+    Transforms the raw stats of many players in one call, instead of one TransformData run per player.
+
+    Parameters:
+        players (dict): player name -> raw frames, either a dict with 'batting', 'bowling', 'fielding',
+                        'allround' and 'personal_info' DataFrames or an object with the matching
+                        attributes (e.g. a raw LoadData or a ScrapeData).
+        type (str): The type of statistics ('all', 'batting', 'bowling', 'fielding', 'allround').
+        mode (str): 'stacked' runs final_df() once per stat type over all players in this process.
+                    'pool' splits the players into `workers` chunks and transforms each chunk stacked
+                    in its own process, so throughput scales with the number of cores.
+        workers (int): Number of processes for 'pool' mode, defaults to the number of CPUs.
+        dtype_backend (str): 'numpy_nullable' or 'pyarrow' (Arrow-backed columns), see TransformData.
+
+    Returns:
+        dict: player name -> TransformData with the transformed stats and the player's own cast_errors,
+              or None if the transform failed.
+    """
+
+    start_time = time.time()
+
+    # Plain dicts of frames, so that they can be sent to other processes
+    players = {name: raw_frames(raw) for name, raw in players.items()}
+    names = list(players)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(names), 1))
+    if mode == "stacked" or workers == 1:
+        results = transform_stacked(players, type, dtype_backend)
+
+    elif mode == "pool":
+        chunks = [names[i::workers] for i in range(workers)]
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(transform_stacked, {name: players[name] for name in chunk}, type, dtype_backend) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    print(f"Error in transforming {', '.join(chunk)}: ", e)
+                    results.update({name: None for name in chunk})
+
+    else:
+        raise ValueError(f"Invalid mode '{mode}'. Must be 'stacked' or 'pool'.")
+
+    end_time = time.time()
+    print(f"Transformed {len(names)} players ({mode} mode, {workers} workers) in {end_time - start_time:.2f} seconds")
+
+    return {name: results.get(name) for name in names}
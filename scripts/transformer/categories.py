@@ -0,0 +1,210 @@
+import os
+import json
+import threading
+import pandas as pd
+from .venues import GAZETTEER_PATH, read_gazetteer
+
+# Low-cardinality text columns of the tf and master tables, stored as pandas categoricals
+CATEGORY_COLS = ['Format', 'Opposition', 'Location', 'Dismissal']
+
+# Fixed vocabulary per column, shipped with the package. Location holds the cities of the shipped venue
+# gazetteer, the value transform_data() maps grounds to.
+CATEGORY_VOCAB = {
+    'Format': ['Test', 'ODI', 'T20I'],
+    'Opposition': ['Afghanistan', 'Australia', 'Bangladesh', 'England', 'India', 'Ireland',
+                   'New Zealand', 'Pakistan', 'South Africa', 'Sri Lanka', 'West Indies', 'Zimbabwe',
+                   'Hong Kong', 'Namibia', 'Nepal', 'Netherlands', 'Scotland', 'U.A.E.', 'U.S.A.'],
+    'Location': sorted({entry['city'] for entry in read_gazetteer(GAZETTEER_PATH)[1].values()}),
+    'Dismissal': ['caught', 'bowled', 'lbw', 'run out', 'stumped', 'hit wicket', 'not out',
+                  'retired hurt', 'retired notout', 'retired out', 'handled ball', 'obstruct field',
+                  'hit ball twice', 'timed out', 'absent']
+}
+
+# Values seen outside the vocabulary, appended in the order they were first seen and kept next to the
+# player ID cache. Every frame gets the vocabulary followed by all of them, so frames built separately
+# (other runs, the pool workers of transform_players) have the same categories and codes.
+USER_CATEGORIES_PATH = os.path.join(os.path.expanduser("~"), ".cricketer_stats", "categories.json")
+
+
+def read_extras(path):
+
+    """Returns {column: extra values in the order they were added} of a union file, {} if it doesn't exist."""
+
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading the category union file {path}: {e}")
+        return {}
+
+
+class CategoryUnion:
+
+    def __init__(self, path=USER_CATEGORIES_PATH):
+
+        """
+        Initialize the union of the category values: the shipped CATEGORY_VOCAB followed by the extra
+        values seen so far, read from and appended to the union file at `path` (None keeps them in memory).
+
+        Parameters:
+            path (str): Location of the union file, e.g. USER_CATEGORIES_PATH.
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.extras = {col: [] for col in CATEGORY_COLS}
+        self.known = {col: set(CATEGORY_VOCAB[col]) for col in CATEGORY_COLS}
+        self.dtypes = {}
+        self.merge(read_extras(self.path))
+
+    def merge(self, extras):
+
+        # Extras of the file first, in its order, so the ones added by other processes keep their place
+        for col, values in extras.items():
+            for value in values:
+                if col in self.known and value not in self.known[col]:
+                    self.extras[col].append(value)
+                    self.known[col].add(value)
+                    self.dtypes.pop(col, None)
+
+    def dtype(self, col, values=()):
+
+        """
+        Returns the categorical dtype of a column: its vocabulary followed by every extra value, after adding
+        the values of `values` that weren't seen yet (in sorted order) to the union file.
+        """
+
+        new = sorted({str(value) for value in values if not pd.isna(value)} - self.known[col])
+        if new:
+            self.add(col, new)
+
+        if col not in self.dtypes:
+            self.dtypes[col] = pd.CategoricalDtype(CATEGORY_VOCAB[col] + self.extras[col])
+        return self.dtypes[col]
+
+    def add(self, col, values):
+
+        with self.lock:
+            # Step 1: Take the values other processes added since this one read the file
+            self.merge(read_extras(self.path))
+            self.merge({col: values})
+            if self.path is None:
+                return
+
+            # Step 2: Write through a temporary file per process and thread, so concurrent writes don't mix
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.extras, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving the category union file {self.path}: {e}")
+
+
+default_union = None
+
+
+def get_union():
+
+    """Returns the category union of this process, reading USER_CATEGORIES_PATH on first use."""
+
+    global default_union
+    if default_union is None:
+        default_union = CategoryUnion()
+    return default_union
+
+
+def category_dtype(col, values=()):
+
+    """
+    Builds the shared categorical dtype of a column.
+
+    Parameters:
+        col (str): One of CATEGORY_COLS.
+        values (iterable): Values that have to be representable besides the vocabulary.
+
+    Returns:
+        pd.CategoricalDtype: Unordered dtype with the vocabulary first, then the extra values in the order
+                             they were first seen (see CategoryUnion).
+    """
+
+    return get_union().dtype(col, values)
+
+
+def is_shared(series, dtype):
+    # Categorical already holding exactly these categories in this order (codes can be reused as they are)
+    return isinstance(series.dtype, pd.CategoricalDtype) and series.cat.categories.equals(dtype.categories)
+
+
+def apply_categories(df, prune=False):
+
+    """
+    Casts the CATEGORY_COLS present in `df` to their shared categorical dtype. Columns that already have it
+    are left as they are, categorical columns with other categories are only recoded (no object round trip).
+
+    Parameters:
+        df (pd.DataFrame): The frame to cast.
+        prune (bool): Only add the values present to the union, not unused categories (tf output).
+                      Without it the categories of a categorical column are taken as they are, so a master
+                      table isn't scanned on every merge.
+    """
+
+    if df is None:
+        return df
+
+    casts = {}
+    for col in CATEGORY_COLS:
+        if col not in df.columns:
+            continue
+
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            values = df[col].cat.remove_unused_categories() if prune else df[col]
+            dtype = category_dtype(col, values.cat.categories)
+            if not is_shared(df[col], dtype):
+                casts[col] = values.cat.set_categories(dtype.categories)
+        else:
+            casts[col] = df[col].astype(object).astype(category_dtype(col, df[col].unique()))
+
+    if not casts:
+        return df
+
+    # Only the recast columns are replaced, the others are shared with the input frame
+    df = df.copy(deep=False)
+    for col, values in casts.items():
+        df[col] = values
+
+    return df
+
+
+def align_categories(*frames):
+
+    """
+    Gives every categorical column the union of the categories found across `frames`, so they can be
+    concatenated without falling back to object dtype. None entries are passed through.
+
+    Frames that already have the union categories (e.g. a master table when the new rows bring no new
+    ground or opposition) are returned as they are, so only the frames that differ are recoded.
+
+    Returns:
+        list: The frames with aligned categories, in the same order.
+    """
+
+    frames = [apply_categories(df) for df in frames]
+    present = [i for i, df in enumerate(frames) if df is not None]
+
+    for col in CATEGORY_COLS:
+        with_col = [i for i in present if col in frames[i].columns]
+        if not with_col:
+            continue
+
+        values = set().union(*(frames[i][col].cat.categories for i in with_col))
+        dtype = category_dtype(col, values)
+        for i in with_col:
+            if not is_shared(frames[i][col], dtype):
+                frames[i] = frames[i].copy(deep=False)
+                frames[i][col] = frames[i][col].cat.set_categories(dtype.categories)
+
+    return frames
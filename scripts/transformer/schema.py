@@ -0,0 +1,236 @@
+import io
+import pandas as pd
+from .categories import apply_categories
+
+# 'numpy_nullable' (default): Int64/string/datetime64 columns. 'pyarrow': Arrow-backed columns, pyarrow is
+# only imported when this backend is used. Categorical columns stay pandas categoricals in both.
+DTYPE_BACKENDS = ['numpy_nullable', 'pyarrow']
+
+
+def arrow_type(dtype):
+
+    """Maps a schema dtype to its pyarrow type, or None for the dtypes kept as they are (category)."""
+
+    import pyarrow as pa
+
+    return {
+        'string': pa.string(),
+        'Int64': pa.int64(),
+        'float64': pa.float64(),
+        'datetime64[ns]': pa.timestamp('ns')
+    }.get(dtype)
+
+
+class Column:
+
+    def __init__(self, name, dtype, nullable=True):
+
+        """
+        One column of a tf table.
+
+        Parameters:
+            name (str): Column name.
+            dtype (str): pandas dtype, e.g. 'Int64', 'float64', 'string', 'category', 'datetime64[ns]'.
+            nullable (bool): Whether missing values are allowed.
+        """
+
+        self.name = name
+        self.dtype = dtype
+        self.nullable = nullable
+
+
+class Schema:
+
+    def __init__(self, stat_type, columns, fallback=None):
+
+        """
+        Declarative layout of a tf table: its columns in order, with their dtypes and nullability.
+        Compiled once into the dtype mappings used by cast() and read_csv().
+
+        Parameters:
+            stat_type (str): The type of statistics ('batting', 'bowling', 'fielding', 'allround').
+            columns (list): Column objects, in output order.
+            fallback (Schema): Schema read_csv() falls back to for files that don't parse with this one,
+                               e.g. master tables still stored with the old string keys.
+        """
+
+        self.stat_type = stat_type
+        self.columns = columns
+        self.fallback = fallback
+        self.names = [col.name for col in columns]
+        self.dtypes = {col.name: col.dtype for col in columns}
+        self.required = [col.name for col in columns if not col.nullable]
+
+        # read_csv() can't parse dates through `dtype`, they go through parse_dates instead
+        self.date_cols = [name for name, dtype in self.dtypes.items() if dtype.startswith('datetime')]
+        self.read_dtypes = {name: dtype for name, dtype in self.dtypes.items() if name not in self.date_cols}
+        self.arrow_dtypes = None
+
+    def backend_dtypes(self, dtype_backend='numpy_nullable'):
+
+        """Returns {column: dtype} for the given dtype backend ('numpy_nullable' or 'pyarrow')."""
+
+        if dtype_backend not in DTYPE_BACKENDS:
+            raise ValueError(f"Invalid dtype_backend '{dtype_backend}'. Must be one of {DTYPE_BACKENDS}.")
+        if dtype_backend == 'numpy_nullable':
+            return self.dtypes
+
+        # Compiled on first use, so pyarrow isn't needed unless the Arrow backend is used
+        if self.arrow_dtypes is None:
+            self.arrow_dtypes = {name: pd.ArrowDtype(arrow_type(dtype)) if arrow_type(dtype) is not None else dtype
+                                 for name, dtype in self.dtypes.items()}
+        return self.arrow_dtypes
+
+    def cast(self, df, dtype_backend='numpy_nullable'):
+
+        """
+        Selects the schema columns in order and casts them in a single astype() call. If that fails,
+        the columns are cast one by one so that every failing column is reported and the rest is still cast.
+        With dtype_backend='pyarrow' the columns are cast straight to Arrow-backed dtypes.
+
+        Returns:
+            tuple: (DataFrame, errors) where errors is a list of dicts with 'stat_type', 'column',
+                   'dtype' and 'error' (cast failures and nulls in non-nullable columns).
+        """
+
+        dtypes = self.backend_dtypes(dtype_backend)
+        df = df[self.names]
+        errors = []
+
+        try:
+            df = df.astype(dtypes)
+        except Exception:
+            df = df.copy()
+            for name, dtype in dtypes.items():
+                try:
+                    df[name] = df[name].astype(dtype)
+                except Exception as e:
+                    errors.append({'stat_type': self.stat_type, 'column': name, 'dtype': str(dtype), 'error': str(e)})
+
+        for name in self.required:
+            nulls = int(df[name].isna().sum())
+            if nulls:
+                errors.append({'stat_type': self.stat_type, 'column': name, 'dtype': self.dtypes[name],
+                               'error': f"{nulls} missing values in a non-nullable column"})
+
+        # Categorical columns share one vocabulary across players and runs (see categories.py)
+        return apply_categories(df, prune=True), errors
+
+    def read_csv(self, buffer, dtype_backend='numpy_nullable'):
+
+        """
+        Reads a tf or master CSV with the schema dtypes in one read_csv() pass. Columns outside
+        the schema are inferred as usual. A file that doesn't parse with the schema dtypes is read
+        with the fallback schema, if there is one.
+
+        Parameters:
+            buffer: Text (numpy_nullable) or binary (pyarrow) file-like object with the CSV.
+            dtype_backend (str): 'numpy_nullable' or 'pyarrow'. With 'pyarrow' the file is parsed by
+                                 pyarrow's CSV reader straight into Arrow-backed columns.
+        """
+
+        if self.fallback is None:
+            return self.read_typed(buffer, dtype_backend)
+
+        try:
+            return self.read_typed(buffer, dtype_backend)
+        except Exception:
+            buffer.seek(0)
+            return self.fallback.read_csv(buffer, dtype_backend)
+
+    def read_typed(self, buffer, dtype_backend='numpy_nullable'):
+
+        """Reads a CSV with the schema dtypes, see read_csv(). Raises if a column doesn't parse."""
+
+        if dtype_backend == 'pyarrow':
+            import pyarrow.csv as pa_csv
+
+            column_types = {name: arrow_type(dtype) for name, dtype in self.dtypes.items()}
+            column_types = {name: pa_type for name, pa_type in column_types.items() if pa_type is not None}
+            table = pa_csv.read_csv(buffer, convert_options=pa_csv.ConvertOptions(column_types=column_types,
+                                                                                 strings_can_be_null=True))
+            return apply_categories(table.to_pandas(types_mapper=pd.ArrowDtype))
+
+        header = pd.read_csv(buffer, nrows=0).columns
+        buffer.seek(0)
+
+        df = pd.read_csv(buffer,
+                         dtype={name: dtype for name, dtype in self.read_dtypes.items() if name in header},
+                         parse_dates=[name for name in self.date_cols if name in header])
+
+        for name in self.date_cols:
+            if name in df.columns:
+                df[name] = df[name].astype(self.dtypes[name])
+
+        return apply_categories(df)
+
+    def to_csv(self, df):
+
+        """
+        Writes an Arrow-backed frame as CSV bytes with pyarrow's CSV writer, without going through
+        object columns. Categorical columns are written as strings and dates without a time part,
+        so the file reads back the same with either backend.
+        """
+
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+            elif field.name in self.date_cols:
+                table = table.set_column(i, field.name, table.column(i).cast(pa.date32()))
+
+        buffer = io.BytesIO()
+        pa_csv.write_csv(table, buffer, write_options=pa_csv.WriteOptions(quoting_style="needed"))
+        return buffer.getvalue()
+
+
+# Columns shared by every tf table, wrapped around the stat-specific ones
+COMMON_HEAD = [
+    Column('Match ID', 'string', nullable=False),
+    Column('Start Date', 'datetime64[ns]', nullable=False),
+    Column('Format', 'category', nullable=False),
+    Column('Inns', 'Int64')
+]
+COMMON_TAIL = [
+    Column('Opposition', 'category', nullable=False),
+    Column('Location', 'category')
+]
+
+SCHEMAS = {
+    'batting': Schema('batting', COMMON_HEAD + [
+        Column('Pos', 'Int64'),
+        Column('Runs', 'Int64'),
+        Column('BF', 'Int64'),
+        Column('4s', 'Int64'),
+        Column('6s', 'Int64'),
+        Column('SR', 'float64'),
+        Column('Mins', 'Int64'),
+        Column('Dismissal', 'category')
+    ] + COMMON_TAIL),
+
+    'bowling': Schema('bowling', COMMON_HEAD + [
+        Column('Pos', 'Int64'),
+        Column('Overs', 'float64'),
+        Column('Mdns', 'Int64'),
+        Column('Runs', 'Int64'),
+        Column('Wkts', 'Int64'),
+        Column('Econ', 'float64')
+    ] + COMMON_TAIL),
+
+    'fielding': Schema('fielding', COMMON_HEAD + [
+        Column('Dis', 'Int64'),
+        Column('Ct', 'Int64')
+    ] + COMMON_TAIL),
+
+    'allround': Schema('allround', COMMON_HEAD + [
+        Column('Score', 'string'),  # Could be runs or DNB, TDNB
+        Column('Overs', 'float64'),
+        Column('Conc', 'Int64'),
+        Column('Wkts', 'Int64'),
+        Column('Ct', 'Int64'),
+        Column('St', 'Int64')
+    ] + COMMON_TAIL)
+}
@@ -1,9 +1,50 @@
+import re
 import pandas as pd
 import numpy as np
+from .schema import SCHEMAS
+from .venues import get_gazetteer
+
+# Raw columns describing the match rather than the player's performance, left untouched by the cleaning rules
+CONTEXT_COLS = ['Opposition', 'Ground', 'Start Date', 'Match id']
+
+# Placeholders the stats engine shows instead of a value (did not bat/bowl/field, substitute)
+NULL_TOKENS = ['DNB', 'TDNB', 'DNF', 'TDNF', '-', 'sub']
+
+OPPOSITION_PATTERN = re.compile(r'^(.*?)\sv\s(.*)$')   # 'ODI v Sri Lanka' -> ('ODI', 'Sri Lanka')
+MATCH_ID_PATTERN = re.compile(r'(\d+$)')                # 'ODI # 2742' -> '2742'
+DATE_FORMAT = '%d %b %Y'                                 # '18 Aug 2008'
+
+# Version of the rules in transform_data(), part of every row hash. Bump it when they change the output,
+# so incremental runs transform every row again instead of reusing rows built by the old rules
+TRANSFORM_VERSION = 1
+
+
+def row_hashes(df, key=""):
+
+    """
+    Hashes every raw row (as text, so the hash doesn't depend on the dtypes read_csv inferred) to a hex string.
+    `key` is hashed with every row: rows hashed under another key never match.
+    """
+
+    hashes = pd.util.hash_pandas_object(df.astype(str).assign(**{"Transform Key": key}), index=False)
+    return pd.Series([f"{value:016x}" for value in hashes.to_numpy()], index=df.index, dtype=object)
+
+
+def clean_stat_column(col):
+
+    """Strips the not-out '*' markers from a stat column and turns the placeholder tokens into NaN."""
+
+    # Numeric columns (as parsed by read_csv) hold neither markers nor tokens
+    if pd.api.types.infer_dtype(col, skipna=True) != 'string':
+        return col
+
+    col = col.str.replace('*', '', regex=False)
+    return col.mask(col.isin(NULL_TOKENS), np.nan)
+
 
 class TransformData:
     
-    def __init__(self, player_name):
+    def __init__(self, player_name, dtype_backend="numpy_nullable"):
         self.player_name = player_name
         self.player_info = None
         self.battingstats = None
@@ -13,150 +54,155 @@ class TransformData:
         self.player_id = None
         self.player_url = None
 
+        # Incremental runs: previous tf frames and the raw row hashes they were built from, per stat type
+        self.previous = {}
+        self.row_hashes = {}
+
+        # Cast failures of the last process_data() run, as dicts with player, stat_type, column, dtype and error
+        self.cast_errors = []
+
+        # VenueGazetteer for the Ground -> Location mapping, the package gazetteer if None
+        self.gazetteer = None
+
+        # 'numpy_nullable' (Int64/string/datetime64 columns) or 'pyarrow' (Arrow-backed columns, opt-in)
+        self.dtype_backend = dtype_backend
+
     #transforming data
 
     def transform_data(self,df):
         
-        #STEP 1: Replacing incorrect values. 
-        repl_dict = {
-            r'\*': '',       
-            r'^DNB$': np.nan,  
-            r'^TDNB$': np.nan, 
-            r'^DNF$': np.nan,  
-            r'^TDNF$': np.nan, 
-            r'^-$': np.nan,    
-            r'^sub$': np.nan   
-                    }
-
-        df = df.replace(repl_dict,regex=True)
-
-        #STEP 2: Opposition column
-        df['Format'] = df['Opposition'].str.extract(r'(^.*?)\sv\s')
-        df['Opposition'] = df['Opposition'].str.extract(r'\sv\s(.*?$)')
-
-        #STEP 3: Ground column
-        ground_mapping = {
-        "Colombo (SSC)": "Colombo",
-        "Colombo (PSS)": "Colombo",
-        "Colombo (RPS)": "Colombo",
-        "Eden Gardens": "Kolkata",
-        "Wankhede": "Mumbai",
-        "Brabourne": "Mumbai",
-        "Kingston": "Kingston Jamaica",
-        "The Oval": "London",
-        "Lord's": "London",
-        "W.A.C.A": "Perth",
-        "Dharamsala": "Dharamshala",
-        "Hamilton": "Hamilton Waikato",
-        "Fatullah": "Fatullah Dhaka",
-        "Providence": "Providence Guyana",
-        "Dubai (DICS)": "Dubai",
-        "Chattogram": "Chattogram Chittagong"
-        }
-
-        df['Ground']=df['Ground'].replace(ground_mapping)
+        #STEP 1: Replacing incorrect values, only in the stat columns (context columns never hold them)
+        df = df.copy()
+        for col in df.columns:
+            if col not in CONTEXT_COLS:
+                df[col] = clean_stat_column(df[col])
+
+        #STEP 2: Opposition column, split once into Format and Opposition
+        parts = df['Opposition'].str.extract(OPPOSITION_PATTERN)
+        df['Format'] = parts[0]
+        df['Opposition'] = parts[1]
+
+        #STEP 3: Ground column, mapped to the canonical city in one join against the venue gazetteer
+        gazetteer = self.gazetteer or get_gazetteer()
+        df['Ground'] = gazetteer.lookup(df['Ground'])['City']
         df = df.rename(columns={'Ground':'Location'})
 
         #STEP 4: START DATE
-        df['Start Date'] = df['Start Date'].astype('datetime64[ns]')
+        df['Start Date'] = pd.to_datetime(df['Start Date'], format=DATE_FORMAT).astype('datetime64[ns]')
 
         #STEP 5: MATCH ID
-        df['Match id']='#'+df['Match id'].str.extract(r'(\d+$)')
+        df['Match id']='#'+df['Match id'].str.extract(MATCH_ID_PATTERN, expand=False)
         df = df.rename(columns={'Match id':'Match ID'})
 
         return df
     
-    def final_df(self, df, common_cols, custom_cols):
-
-        dtype_mapping = {
-
-                # Common Columns
-                'Match ID': 'string',
-                'Start Date': 'datetime64[ns]',
-                'Format': 'string',
-                'Inns': 'Int64',  # Allows NaN handling
-                'Opposition': 'string',
-                'Location': 'string',
-                
-                # Batting Columns
-                'Pos': 'Int64',
-                'Runs': 'Int64',
-                'BF': 'Int64',
-                '4s': 'Int64',
-                '6s': 'Int64',
-                'SR': 'float64',
-                'Mins': 'Int64',
-                'Dismissal': 'string',
-
-                # Bowling Columns
-                'Overs': 'float64',
-                'Mdns': 'Int64',
-                'Runs': 'Int64',
-                'Wkts': 'Int64',
-                'Econ': 'float64',
-
-                # Fielding Columns
-                'Dis': 'Int64',
-                'Ct': 'Int64',
-
-                # Allround Columns
-                'Score': 'string',  # Could be runs or DNB, TDNB
-                'Conc': 'Int64',
-                'St': 'Int64'
-            }
+    def cast_types(self, df, stat_type):
+
+        # Select, order and cast the columns of the stat type's schema in one step, collecting any failures
+        df, errors = SCHEMAS[stat_type].cast(df, self.dtype_backend)
+        for error in errors:
+            self.cast_errors.append(dict(error, player=self.player_name))
+
+        return df
+
+    def transform_key(self):
+
+        """The version of the transform rules and of the venue gazetteer, the key of the row hashes."""
+
+        gazetteer = self.gazetteer or get_gazetteer()
+        return f"{TRANSFORM_VERSION}:{gazetteer.fingerprint()}"
+
+    def final_df(self, df, stat_type):
 
         if df is not None:
             df = self.transform_data(df)
+            return self.cast_types(df, stat_type)
+
+    def incremental_df(self, df, stat_type):
+
+        """
+        Transforms only the raw rows that are new or changed since the last run and splices them into
+        the previous tf frame, falling back to final_df() when there is no usable previous output.
+
+        Parameters:
+            df (pd.DataFrame): The full raw frame of the player.
+            stat_type (str): The type of statistics ('batting', 'bowling', 'fielding', 'allround').
+
+        Returns:
+            pd.DataFrame: The tf frame in raw row order, equal to final_df(df, stat_type). The hashes of the
+                          raw rows are kept in self.row_hashes[stat_type] for the next run. They are keyed
+                          by transform_key(), so no row is reused once the rules or the gazetteer change.
+        """
+
+        if df is None:
+            return None
+
+        df = df.reset_index(drop=True)
+        hashes = row_hashes(df, self.transform_key())
+        previous, old_hashes = self.previous.get(stat_type), self.row_hashes.get(stat_type)
+
+        if previous is None or old_hashes is None or len(previous) != len(old_hashes):
+            result = self.final_df(df, stat_type)
+
+        else:
+            # Step 1: Match every raw row to the row of the previous output with the same hash
+            positions = pd.Series(np.arange(len(old_hashes)), index=pd.Index(old_hashes))
+            positions = positions[~positions.index.duplicated()]
+            matched = hashes.map(positions)
+            is_new = matched.isna()
+
+            # Step 2: Reuse the matched rows, transform only the new or changed ones
+            kept = self.cast_types(previous.iloc[matched[~is_new].astype(int)].set_axis(df.index[~is_new]), stat_type)
+            parts = [kept]
+            if is_new.any():
+                parts.append(self.final_df(df[is_new], stat_type))
 
-            # Select the necessary columns
-            df = df[common_cols[:-2] + custom_cols + common_cols[-2:]]
+            # Step 3: Put the rows back in raw order, rows dropped from the raw frame disappear
+            result = self.cast_types(pd.concat(parts).reindex(df.index), stat_type).reset_index(drop=True)
+            print(f"Transformed {int(is_new.sum())} new or changed rows, reused {int((~is_new).sum())} rows.")
 
-            # Apply type casting
-            for col in df.columns:
-                if col in dtype_mapping:
-                    try:
-                        df[col] = df[col].astype(dtype_mapping[col])
-                    except Exception as e:
-                        print(f"Data type casting failed for column {col}: {e}")
+        self.row_hashes[stat_type] = hashes
+        return result
 
-            return df
 
+    def is_allrounder(self):
+        return self.player_info is not None and 'allround' in self.player_info['PLAYING ROLE'][0].lower()
 
     def process_data(self,type="all"):
 
-        common = ['Match ID','Start Date','Format','Inns','Opposition','Location']
-        batcols = ['Pos','Runs','BF','4s','6s','SR','Mins','Dismissal']
-        bowlcols = ['Pos','Overs','Mdns','Runs','Wkts','Econ']
-        fieldcols = ['Dis','Ct']
-        allroundcols = ['Score','Overs','Conc','Wkts','Ct','St']
+        # Stat types with a previous tf frame and row hashes in self.previous / self.row_hashes
+        # only get their new or changed rows transformed (see incremental_df)
+        self.cast_errors = []
 
         try:
         
             # Process batting stats
             if type == 'all' or type == 'batting':
                 print(f"Processing {self.player_name}'s batting stats...")
-                self.battingstats = self.final_df(self.battingstats, common, batcols)
+                self.battingstats = self.incremental_df(self.battingstats, 'batting')
                 print(f"Batting stats processed successfully.")
 
             # Process bowling stats
             if type == 'all' or type == 'bowling':
                 print(f"Processing {self.player_name}'s bowling stats...")
-                self.bowlingstats = self.final_df(self.bowlingstats, common, bowlcols)
+                self.bowlingstats = self.incremental_df(self.bowlingstats, 'bowling')
                 print(f"Bowling stats processed successfully.")
 
             # Process fielding stats
             if type == 'all' or type == 'fielding':
                 print(f"Processing {self.player_name}'s fielding stats...")
-                self.fieldingstats = self.final_df(self.fieldingstats, common, fieldcols)
+                self.fieldingstats = self.incremental_df(self.fieldingstats, 'fielding')
                 print(f"Fielding stats processed successfully.")
 
             # Process allround stats
             if type == 'all' or type == 'allround':
-                if self.player_info is not None and 'allround' in self.player_info['PLAYING ROLE'][0].lower():
+                if self.is_allrounder():
                     print(f"Processing {self.player_name}'s all-round stats...")
-                    self.allroundstats = self.final_df(self.allroundstats, common, allroundcols)
+                    self.allroundstats = self.incremental_df(self.allroundstats, 'allround')
                     print(f"All-round stats processed successfully.")
 
+            if self.cast_errors:
+                print(f"{len(self.cast_errors)} data type casting failures for {self.player_name}, see cast_errors.")
            
         except Exception as e:
             print(f"Error in processing data for {self.player_name}: ", e)
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import difflib
+import pandas as pd
+
+# Gazetteer shipped with the package, seeded with every ground of the stats engine seen so far. Read-only
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "grounds.json")
+
+# Grounds approved by the user, kept next to the player ID cache and read on top of the shipped gazetteer
+USER_GAZETTEER_PATH = os.path.join(os.path.expanduser("~"), ".cricketer_stats", "grounds.json")
+
+VENUE_COLS = ['Ground ID', 'City', 'Country']
+
+
+def normalize_name(name):
+
+    """Lower-cases a ground name and reduces punctuation to single spaces, e.g. "Lord's" -> 'lord s'."""
+
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(name).lower()).split())
+
+
+def blocking_keys(normalized):
+
+    """Keys of the blocks a name is compared in: the first three letters of each of its words."""
+
+    return {word[:3] for word in normalized.split()}
+
+
+def read_gazetteer(path):
+
+    """Returns (version, grounds) of a gazetteer file, (0, {}) if it doesn't exist."""
+
+    if not path or not os.path.exists(path):
+        return 0, {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["version"], data["grounds"]
+
+
+class VenueGazetteer:
+
+    def __init__(self, path=GAZETTEER_PATH, user_path=None, min_score=0.85):
+
+        """
+        Initialize the venue dimension: a versioned JSON gazetteer mapping raw ground names, as shown
+        by the stats engine, to a canonical city, country and ground ID.
+
+        Layout:
+            {"version": 3, "grounds": {"Eden Gardens": {"ground_id": 29, "city": "Kolkata", "country": "India",
+                                                        "normalized": "eden gardens", "source": "seed"}, ...}}
+
+        The gazetteer at `path` is only read. Grounds added with approve() go to the file at `user_path`,
+        which is read on top of it; without a `user_path` they are kept in memory only.
+
+        Parameters:
+            path (str): Location of the seed gazetteer, the one shipped with the package by default.
+            user_path (str): Location of the user's gazetteer, e.g. USER_GAZETTEER_PATH. None to not persist.
+            min_score (float): Minimum similarity (0-1) for a fuzzy suggestion of an unseen name.
+        """
+
+        self.path = path
+        self.user_path = user_path
+        self.min_score = min_score
+        self.lock = threading.Lock()
+
+        # Step 1: Seed grounds, then the user's grounds on top of them
+        seed_version, self.grounds = read_gazetteer(self.path)
+        self.user_version, self.user_grounds = read_gazetteer(self.user_path)
+        self.grounds = dict(self.grounds, **self.user_grounds)
+        self.version = seed_version + self.user_version
+
+        # Step 2: Unseen names -> suggested known ground (or None), left for approve()
+        self.review = {}
+
+        self.build_index()
+
+    def build_index(self):
+
+        # Step 1: Normalized name -> venue, the table lookup() joins against
+        table = pd.DataFrame([{'Normalized': entry.get('normalized') or normalize_name(name),
+                               'Ground ID': entry['ground_id'], 'City': entry['city'], 'Country': entry['country']}
+                              for name, entry in self.grounds.items()], columns=['Normalized'] + VENUE_COLS)
+        self.index = table.drop_duplicates('Normalized').set_index('Normalized')
+
+        # Step 2: Blocks of candidate names for the fuzzy matcher
+        self.blocks = {}
+        for normalized in self.index.index:
+            for key in blocking_keys(normalized):
+                self.blocks.setdefault(key, set()).add(normalized)
+
+        # Step 3: Names the gazetteer knows by their normalized form, for the review suggestions
+        self.names = {entry.get('normalized') or normalize_name(name): name for name, entry in self.grounds.items()}
+
+    def fingerprint(self):
+
+        """
+        A hash of the name -> city mapping lookup() applies. It changes whenever a ground is added or its
+        city is edited, so caches of transformed rows can tell they were built with another gazetteer.
+        """
+
+        mapping = sorted(self.index['City'].astype(str).items())
+        return hashlib.sha1(json.dumps(mapping).encode("utf-8")).hexdigest()[:16]
+
+    def match(self, normalized):
+
+        """Returns the known normalized name most similar to `normalized`, or None if none reaches min_score."""
+
+        candidates = set().union(*(self.blocks.get(key, set()) for key in blocking_keys(normalized)))
+
+        best, best_score = None, self.min_score
+        for candidate in sorted(candidates):
+            score = difflib.SequenceMatcher(None, normalized, candidate).ratio()
+            if score >= best_score:
+                best, best_score = candidate, score
+
+        return best
+
+    def flag(self, names):
+
+        """
+        Puts unseen ground names on the review list with the most similar known ground as a suggestion.
+        Nothing is added to the gazetteer: lookup() passes these names through until they are approved.
+        """
+
+        with self.lock:
+            for name in names:
+                if name not in self.review:
+                    match = self.match(normalize_name(name))
+                    self.review[name] = self.names[match] if match is not None else None
+                    suggestion = f", similar to {self.review[name]!r}" if match is not None else ""
+                    print(f"Ground {name!r} is not in the gazetteer{suggestion}; kept as is until approved")
+
+    def approve(self, name, ground=None, city=None, country=None):
+
+        """
+        Adds a ground name to the gazetteer, as an alias of a known ground or as a new ground, bumps the
+        version and saves the user's gazetteer if there is one.
+
+        Parameters:
+            name (str): The raw ground name, e.g. one of the names in `review`.
+            ground (str): A known ground name the new name is an alias of, e.g. the suggestion in `review`.
+            city (str): The city of a new ground, the name itself if None.
+            country (str): The country of a new ground.
+        """
+
+        with self.lock:
+            if ground is not None:
+                venue = self.index.loc[normalize_name(ground)]
+                entry = {"ground_id": int(venue['Ground ID']), "city": venue['City'],
+                         "country": None if pd.isna(venue['Country']) else venue['Country'], "source": "alias"}
+            else:
+                ground_id = max((entry['ground_id'] for entry in self.grounds.values()), default=0) + 1
+                entry = {"ground_id": ground_id, "city": city or name, "country": country, "source": "manual"}
+
+            entry["normalized"] = normalize_name(name)
+            self.grounds[name] = self.user_grounds[name] = entry
+            self.review.pop(name, None)
+            self.user_version += 1
+            self.version += 1
+            self.build_index()
+            print(f"Added ground {name!r} to the gazetteer ({entry['source']}): {entry['city']}, {entry['country']}")
+
+        if self.user_path is not None:
+            self.save()
+
+    def lookup(self, grounds):
+
+        """
+        Maps raw ground names to their venues in one join against the normalized-name index.
+        Names that aren't in the index keep their raw name as the City (no Ground ID or Country)
+        and go on the review list.
+
+        Parameters:
+            grounds (pd.Series): Raw ground names.
+
+        Returns:
+            pd.DataFrame: 'Ground ID', 'City' and 'Country' aligned with `grounds` (NaN where the name is NaN).
+        """
+
+        names = grounds.dropna().unique()
+        normalized = {name: normalize_name(name) for name in names}
+
+        unseen = [name for name in names if normalized[name] not in self.index.index]
+        if unseen:
+            self.flag(unseen)
+
+        keys = grounds.map(normalized).rename('Normalized')
+        venues = keys.to_frame().merge(self.index, how='left', left_on='Normalized', right_index=True)
+
+        venues = venues[VENUE_COLS].set_axis(grounds.index)
+        venues['Ground ID'] = venues['Ground ID'].astype('Int64')
+        venues['City'] = venues['City'].fillna(grounds)
+
+        return venues
+
+    def save(self):
+
+        """Writes the grounds added with approve() to `user_path`. The seed gazetteer is never written."""
+
+        if self.user_path is None:
+            print("The venue gazetteer has no user path, nothing saved")
+            return
+
+        with self.lock:
+            try:
+                os.makedirs(os.path.dirname(self.user_path) or ".", exist_ok=True)
+                # One temporary file per process and thread, so concurrent saves don't write into each other
+                tmp_path = f"{self.user_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": self.user_version, "grounds": self.user_grounds}, f,
+                              indent=2, sort_keys=True, ensure_ascii=False)
+                os.replace(tmp_path, self.user_path)
+                print(f"Saved venue gazetteer version {self.user_version} to {self.user_path}")
+
+            except OSError as e:
+                print(f"Error saving the venue gazetteer to {self.user_path}: {e}")
+
+
+default_gazetteer = None
+
+
+def get_gazetteer():
+
+    """
+    Returns the gazetteer shared by the TransformData instances of this process, loading it on first use:
+    the shipped gazetteer with the user's approved grounds (USER_GAZETTEER_PATH) on top, if any.
+    """
+
+    global default_gazetteer
+    if default_gazetteer is None:
+        default_gazetteer = VenueGazetteer(user_path=USER_GAZETTEER_PATH)
+    return default_gazetteer
@@ -20,6 +20,7 @@ setup(
     package_dir={"":"scripts"},
     packages=find_packages(where="scripts", exclude=["tests","tests.*"]),
     include_package_data=True,
+    package_data={"transformer": ["data/*.json"]},
     install_requires=req
 )
 
@@ -0,0 +1,38 @@
+from loader import LoadData
+from aggregator import aggregate_players, MasterData
+from transformer.schema import SCHEMAS
+
+def main():
+    # ─────────── CONFIG ───────────
+    player_names = ["Virat Kohli", "Rohit Sharma", "Jasprit Bumrah"]
+    bucket_name  = "cricketer-stats"
+    stat_type    = "all"  # 'all', 'batting', 'bowling', 'fielding', 'allround', 'personal_info'
+    # ───────────────────────────────
+
+    print(f"[AGGREGATOR] Downloading transformed data for {len(player_names)} players from bucket {bucket_name!r}...")
+    tf_loaders, player_ids = {}, []
+    for player_name in player_names:
+        tf_loaders[player_name] = LoadData(player_name, data_type="tf", schemas=SCHEMAS)
+        tf_loaders[player_name].load_data(bucket_name, load_type="download", stat_type="all")
+
+        player_info = tf_loaders[player_name].player_info
+        if player_info is not None and not player_info.empty:
+            player_ids.append(player_info['Player ID'][0])
+
+    print(f"[AGGREGATOR] Downloading existing master data from bucket {bucket_name!r}...")
+    # Partitioned master: only the partitions of these players are downloaded, merged and uploaded again
+    master_loader = MasterData(partitioned=True)
+    master_loader.player_ids = player_ids
+    master_loader.load_data(bucket_name, load_type="download", stat_type=stat_type)
+
+    print(f"[AGGREGATOR] Aggregating data for {len(player_names)} players...")
+    report = aggregate_players(bucket_name, tf_loaders, master_loader, stat_type=stat_type)
+
+    print(f"[AGGREGATOR] Uploading updated master data to bucket {bucket_name!r}...")
+    master_loader.load_data(bucket_name, load_type="upload", stat_type=stat_type)
+
+    failed = [player_name for player_name, error in report.items() if error is not None]
+    print(f"[AGGREGATOR] Done for {len(player_names) - len(failed)} players, failed: {failed}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from loader import LoadData
+from aggregator import Aggregator, MasterData
+from aggregator.summary import build_summary
+from transformer.schema import SCHEMAS
+
+def main():
+    # ─────────── CONFIG ───────────
+    player_name = "Virat Kohli"
+    bucket_name = "cricketer-stats"
+    # ───────────────────────────────
+
+    print(f"[AGGREGATOR] Downloading transformed data for {player_name!r}...")
+    tf_loader = LoadData(player_name, data_type="tf", schemas=SCHEMAS)
+    tf_loader.load_data(bucket_name, load_type="download", stat_type="all")
+    player_id = tf_loader.player_info['Player ID'][0]
+
+    print(f"[AGGREGATOR] Downloading this player's master partitions from bucket {bucket_name!r}...")
+    master_loader = MasterData(partitioned=True)
+    master_loader.player_ids = [player_id]
+    master_loader.load_data(bucket_name, load_type="download", stat_type="all")
+
+    # Existing masters without a summary: the summary is built from every partition, not from this player's
+    print("[AGGREGATOR] Building the career summary as if none were stored...")
+    master_loader.career_summary = master_loader.build_summary(bucket_name)
+
+    # ─────────── RUN WITHOUT UPLOAD ───────────
+    agg = Aggregator(bucket_name, player_name, player_id)
+    agg.batting_concat   = tf_loader.battingstats
+    agg.bowling_concat   = tf_loader.bowlingstats
+    agg.fielding_concat  = tf_loader.fieldingstats
+    agg.batting_master   = master_loader.battingstats
+    agg.bowling_master   = master_loader.bowlingstats
+    agg.fielding_master  = master_loader.fieldingstats
+    agg.summary_master   = master_loader.career_summary
+    for stat_type in ["batting", "bowling", "fielding"]:
+        agg.run_agg(stat_type=stat_type)
+
+    # ─────────── CHECK AGAINST THE FULL MASTERS ───────────
+    print("[AGGREGATOR] Rebuilding the summary from the full masters after the run...")
+    full_loader = MasterData(partitioned=True)
+    masters = {}
+    for stat_type, attr in [("batting", "batting_master"), ("bowling", "bowling_master"), ("fielding", "fielding_master")]:
+        full_df = full_loader.download_partitions(bucket_name, stat_type)
+        full_df.update(getattr(agg, attr))
+        masters[stat_type] = full_df
+    expected = build_summary(masters)
+
+    matches = expected is not None and agg.summary_master is not None and \
+              expected.astype(str).equals(agg.summary_master.astype(str))
+    print(f"[AGGREGATOR] Summary matches the full masters: {matches} ({len(agg.summary_master)} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from loader import LoadData
-from aggregator import Aggregator
+from aggregator import Aggregator, MasterData
+from transformer.schema import SCHEMAS
 
 def main():
     # ─────────── CONFIG ───────────
@@ -9,7 +10,7 @@ def main():
     # ───────────────────────────────
 
     print(f"[AGGREGATOR] Downloading transformed data for {player_name!r}...")
-    tf_loader = LoadData(player_name, data_type="tf")
+    tf_loader = LoadData(player_name, data_type="tf", schemas=SCHEMAS)
     tf_loader.load_data(bucket_name, load_type="download", stat_type=stat_type)
 
     # Ensure player_info is available every time
@@ -17,8 +18,13 @@ def main():
     player_id = tf_loader.player_info['Player ID'][0]
 
     print(f"[AGGREGATOR] Downloading existing master data from bucket {bucket_name!r}...")
-    master_loader = LoadData(player_name, data_type="tf", master=True)
+    # Partitioned master: only this player's partitions are downloaded, merged and uploaded again
+    master_loader = MasterData(partitioned=True)
+    master_loader.player_ids = [player_id]
     master_loader.load_data(bucket_name, load_type="download", stat_type=stat_type)
+    if stat_type != "all":
+        for table in ["career_summary", "form"]:
+            master_loader.load_data(bucket_name, load_type="download", stat_type=table)
 
     # Initialize Aggregator
     agg = Aggregator(bucket_name, player_name, player_id)
@@ -36,6 +42,8 @@ def main():
     agg.fielding_master  = master_loader.fieldingstats
     agg.allround_master  = master_loader.allroundstats
     agg.info_master      = master_loader.player_info
+    agg.summary_master   = master_loader.career_summary
+    agg.form_master      = master_loader.form
 
     print(f"[AGGREGATOR] Aggregating data for {player_name!r}...")
     agg.run_agg(stat_type=stat_type)
@@ -47,10 +55,15 @@ def main():
     master_loader.fieldingstats  = agg.fielding_master
     master_loader.allroundstats  = agg.allround_master
     master_loader.player_info    = agg.info_master
+    master_loader.career_summary = agg.summary_master
+    master_loader.form           = agg.form_master
+    master_loader.changes        = agg.changes  # written under master/_changes/ after the masters
 
     master_loader.load_data(bucket_name, load_type="upload", stat_type=stat_type)
     if stat_type not in ["all","personal_info"]:
         master_loader.load_data(bucket_name, load_type="upload", stat_type="personal_info")
+        master_loader.load_data(bucket_name, load_type="upload", stat_type="career_summary")
+        master_loader.load_data(bucket_name, load_type="upload", stat_type="form")
 
     print(f"[AGGREGATOR] Done for {player_name!r}.")
 
@@ -0,0 +1,35 @@
+from scraper import scrape_players, ScrapeMetrics
+from loader import LoadData
+
+def main():
+    # ─────────── CONFIG ───────────
+    player_names = ["Virat Kohli", "Rohit Sharma", "Jasprit Bumrah"]
+    bucket_name  = "cricketer-stats"
+    workers      = 3   # number of warm browsers / players scraped at the same time
+    metrics_path = "logs/scraper_metrics.jsonl"
+    # ───────────────────────────────
+
+    print(f"[SCRAPER] Starting batch scrape for {len(player_names)} players with {workers} workers...")
+    metrics = ScrapeMetrics()
+    scrapers = scrape_players(player_names, stats_type="all", workers=workers, metrics=metrics)
+    metrics.to_jsonl(metrics_path)
+
+    for player_name, scraper in scrapers.items():
+        if scraper is None:
+            print(f"[SCRAPER] Skipping upload for {player_name!r}, scraping failed.")
+            continue
+
+        print(f"[SCRAPER] Uploading raw data for {player_name!r} to bucket {bucket_name!r}...")
+        loader = LoadData(player_name, data_type="raw")
+
+        loader.battingstats   = scraper.battingstats
+        loader.bowlingstats   = scraper.bowlingstats
+        loader.fieldingstats  = scraper.fieldingstats
+        loader.allroundstats  = scraper.allroundstats
+        loader.player_info    = scraper.player_info
+        loader.load_data(bucket_name, load_type="upload")
+
+    print(f"[SCRAPER] Done for {len(player_names)} players.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import pandas as pd
+from scraper import ScrapeData, FixtureServer, SnapshotStore
+
+def main():
+    # ─────────── CONFIG ───────────
+    player_name = "Virat Kohli"
+    player_id = "253802"
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+    fixtures_dir = os.path.join(data_dir, "fixtures")   # ← pages recorded with HttpFetcher(record_dir=...)
+    # ───────────────────────────────
+
+    expected = pd.read_csv(os.path.join(data_dir, "raw_virat_kohli_batting_stats.csv"), dtype=str, keep_default_na=False)
+
+    with FixtureServer(fixtures_dir) as server, tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshots = SnapshotStore(root=snapshot_dir)
+
+        print(f"[SCRAPER] Scraping {player_name!r} over HTTP from the fixture server at {server.url}...")
+        scraper = ScrapeData(player_name, backend="http", stats_url=server.url, player_id=player_id, snapshots=snapshots)
+        scraper.get_player_stats(stats_type="batting")
+        http_df = scraper.battingstats
+
+        print(f"[SCRAPER] Streaming the batting stats of {player_name!r} from the fixture server...")
+        stream_df = pd.concat(list(scraper.stream_inns_data("batting")), ignore_index=True)
+
+        print(f"[SCRAPER] Replaying {player_name!r} from the snapshots of the HTTP run...")
+        replayer = ScrapeData(player_name, player_id=player_id, snapshots=snapshots, replay=True)
+        replayer.get_player_stats(stats_type="batting")
+        replay_df = replayer.battingstats
+
+        scraper.fetcher.close()
+
+    # ─────────── CHECK THE BACKENDS AGAINST EACH OTHER ───────────
+    results = {"stream": stream_df, "replay": replay_df}
+    for name, df in results.items():
+        matches = df is not None and df.equals(http_df)
+        print(f"[SCRAPER] {name} matches http: {matches} ({0 if df is None else len(df)} rows)")
+
+    matches = http_df is not None and http_df.equals(expected)
+    print(f"[SCRAPER] http matches the raw data: {matches} ({len(expected)} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from loader import LoadData
+from transformer import transform_players
+
+def main():
+    # ─────────── CONFIG ───────────
+    player_names = ["Virat Kohli", "Rohit Sharma", "Jasprit Bumrah"]
+    bucket_name  = "cricketer-stats"
+    mode         = "pool"   # 'pool' (one process per chunk of players) or 'stacked' (single process)
+    workers      = 3
+    # ───────────────────────────────
+
+    print(f"[TRANSFORMER] Downloading raw data for {len(player_names)} players from bucket {bucket_name!r}...")
+    raw_loaders = {}
+    for player_name in player_names:
+        raw_loaders[player_name] = LoadData(player_name, data_type="raw")
+        raw_loaders[player_name].load_data(bucket_name, load_type="download")
+
+    print(f"[TRANSFORMER] Transforming data for {len(player_names)} players ({mode} mode)...")
+    transformers = transform_players(raw_loaders, mode=mode, workers=workers)
+
+    for player_name, transformer in transformers.items():
+        if transformer is None:
+            print(f"[TRANSFORMER] Skipping upload for {player_name!r}, transform failed.")
+            continue
+
+        print(f"[TRANSFORMER] Uploading transformed data for {player_name!r} to bucket {bucket_name!r}...")
+        tf_loader = LoadData(player_name, data_type="tf")
+
+        tf_loader.battingstats   = transformer.battingstats
+        tf_loader.bowlingstats   = transformer.bowlingstats
+        tf_loader.fieldingstats  = transformer.fieldingstats
+        tf_loader.allroundstats  = transformer.allroundstats
+        tf_loader.player_info    = transformer.player_info
+        tf_loader.load_data(bucket_name, load_type="upload")
+
+    print(f"[TRANSFORMER] Done for {len(player_names)} players.")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from loader import LoadData
 from transformer import TransformData
+from transformer.schema import SCHEMAS
 
 def main():
     # ─────────── CONFIG ───────────
@@ -19,11 +20,23 @@ def main():
     transformer.allroundstats = raw_loader.allroundstats
     transformer.player_info   = raw_loader.player_info
 
+    # Previous tf output and its raw row hashes, so only new or changed rows are transformed
+    print(f"[TRANSFORMER] Downloading previous transformed data for {player_name!r}...")
+    tf_loader = LoadData(player_name, data_type="tf", schemas=SCHEMAS)
+    tf_loader.load_data(bucket_name, load_type="download")
+
+    transformer.previous = {
+        "batting":  tf_loader.battingstats,
+        "bowling":  tf_loader.bowlingstats,
+        "fielding": tf_loader.fieldingstats,
+        "allround": tf_loader.allroundstats
+    }
+    transformer.row_hashes = tf_loader.download_row_hashes(bucket_name)
+
     print(f"[TRANSFORMER] Transforming data for {player_name!r}...")
     transformer.process_data()
 
     print(f"[TRANSFORMER] Uploading transformed data for {player_name!r} to bucket {bucket_name!r}...")
-    tf_loader = LoadData(player_name, data_type="tf")
 
     tf_loader.battingstats   = transformer.battingstats
     tf_loader.bowlingstats   = transformer.bowlingstats
@@ -32,6 +45,7 @@ def main():
     tf_loader.player_info    = transformer.player_info
 
     tf_loader.load_data(bucket_name, load_type="upload")
+    tf_loader.upload_row_hashes(bucket_name, transformer.row_hashes)
 
     print(f"[TRANSFORMER] Done for {player_name!r}.")
 